@@ -1,32 +1,65 @@
 import streamlit as st
-from logic import get_prediction_distribution, get_number_of_users, get_next_matchday, save_predictions_db, get_matches, get_existing_users, get_match_predictions, get_jackpot_for_matchday
+from logic import get_prediction_distribution, get_number_of_users, get_next_matchday, save_predictions_db, get_matches, get_existing_users, get_match_predictions, get_jackpot_for_matchday, get_pending_saves, get_pools, get_match_probabilities, get_last_refresh, start_outbox_flusher
+from pools import pool_names, resolve_pool
 import pandas as pd
+from profiling import profile_script
+from metrics import counted_cache, start_server
+
+# Opt-in profile of this run (FCF_PROFILE=1, or FCF_PROFILE=query and ?profile=1)
+profile_script("app", st.query_params.get("profile"))
 
 st.set_page_config(page_title="Futsal Predictor", layout="centered")
 
+# Serve this process's query and cache metrics on /metrics when FCF_METRICS_PORT is set
+start_server()
+
+# Saved predictions reach the database from a background thread (db/outbox.py)
+start_outbox_flusher()
+
 # --- Cached functions ---
 # Cache for functions that fetch data from your 'logic' module.
 # Adjust ttl (time to live) based on how frequently your data updates.
 
-@st.cache_data(ttl=3600) # Cache for 1 hour (matchday might change more often)
+@counted_cache("matchday", st.cache_data(ttl=3600)) # Cache for 1 hour (matchday might change more often)
 def cached_get_matchday():
     return get_next_matchday()
 
-@st.cache_data(ttl=3600) # Cache for 1 hour
+@counted_cache("matches", st.cache_data(ttl=3600)) # Cache for 1 hour
 def cached_get_matches(jornada_number):
     return get_matches(jornada_number)
 
-@st.cache_data(ttl=60) # Cache for 1 minute (distributions might update more frequently)
-def cached_get_prediction_distribution(home_team, away_team):
-    return get_prediction_distribution(home_team, away_team)
+# Pool-scoped functions take pool_id, so every pool gets its own cache entries
+@counted_cache("pools", st.cache_data(ttl=3600))
+def cached_get_pools():
+    return get_pools()
+
+@counted_cache("existing_users", st.cache_data(ttl=3600))
+def cached_get_existing_users(pool_id):
+    return get_existing_users(pool_id)
 
-@st.cache_data(ttl=60) # Cache for 1 minute
-def cached_get_match_predictions(home_team, away_team):
-    return get_match_predictions(home_team, away_team)
+# Whole-jornada reads: one query each, however many matches the jornada has
+@counted_cache("prediction_distribution", st.cache_data(ttl=60)) # Cache for 1 minute (distributions might update more frequently)
+def cached_get_prediction_distribution(jornada_number, pool_id):
+    return get_prediction_distribution([m["match_id"] for m in cached_get_matches(jornada_number)], pool_id)
 
+@counted_cache("match_predictions", st.cache_data(ttl=60)) # Cache for 1 minute
+def cached_get_match_predictions(jornada_number, pool_id):
+    return get_match_predictions(jornada_number, pool_id)
+
+@counted_cache("match_probabilities", st.cache_data(ttl=3600)) # Model odds only move when the classification does,
+def cached_get_match_probabilities(jornada_number, last_refresh):  # so every refresh gets its own entry
+    return get_match_probabilities(cached_get_matches(jornada_number))
+
+
+# --- Pool ---
+pools = pool_names(cached_get_pools())
+pool_id = resolve_pool(st.query_params.get("pool", st.session_state.get("pool_id")), pools)
+if len(pools) > 1:
+    pool_id = st.selectbox("Pool:", list(pools), index=list(pools).index(pool_id), format_func=pools.get)
+st.session_state.pool_id = pool_id
 
 # --- Title and description ---
-st.title("⚽ Futsal Predictor - Senior B")
+st.title(f"⚽ Futsal Predictor - {pools[pool_id]}")
 st.caption("Predict the next Jornada (1X2)")
 
 # Initialize session state for predictions if not already present
@@ -35,7 +68,7 @@ if 'predictions_state' not in st.session_state:
     st.session_state.predictions_state = {}
 
 # --- Get username ---
-user_list = get_existing_users()
+user_list = cached_get_existing_users(pool_id)
 if not user_list:
     user_list = ["Select user", "User1", "User2", "User3"]  # fallback example
 
@@ -103,6 +136,9 @@ div[data-testid="stColumn"] {
 # --- Display matches ---
 current_predictions_for_saving = {} # This dict will be used to collect predictions for saving
 matches = cached_get_matches(matchday['number']) # Use cached function
+model_odds = cached_get_match_probabilities(matchday['number'], get_last_refresh()) # Whole jornada in one pass
+distributions = cached_get_prediction_distribution(matchday['number'], pool_id)
+predictions_by_match = cached_get_match_predictions(matchday['number'], pool_id)
 
 for i, match in enumerate(matches):
     home_team = match["home_team"]
@@ -163,8 +199,9 @@ for i, match in enumerate(matches):
             st.session_state.predictions_state[prediction_state_key] = "2"
 
     # --- Stats display ---
-    dist = cached_get_prediction_distribution(home_team, away_team) # Use cached function
-    users_who_predicted_this_match = cached_get_match_predictions(home_team, away_team) # Use cached function
+    dist = distributions.get(match["match_id"], {})
+    odds = model_odds.get(match["match_id"], {})
+    users_who_predicted_this_match = predictions_by_match.get(match["match_id"], {})
 
     st.markdown("<div style='margin-top:-10px;'></div>", unsafe_allow_html=True)
     col1_stats, col2_stats, col3_stats = st.columns(3) # Use different variable names to avoid conflict
@@ -172,6 +209,8 @@ for i, match in enumerate(matches):
     for col, opt in zip([col1_stats, col2_stats, col3_stats], ["1", "X", "2"]):
         with col:
             pct = round(dist.get(opt, 0) * 100, 1)
+            # Poisson model probability next to the crowd's share
+            model_label = f" <span style='font-size:12px;color:#4CAF50;'>· model {round(odds[opt] * 100)}%</span>" if opt in odds else ""
             # Filter users for this specific prediction option
             names = ", ".join(users_who_predicted_this_match.get(opt, []))
             st.markdown(
@@ -183,7 +222,7 @@ for i, match in enumerate(matches):
                     background-color:rgba(0,0,0,0.03);
                     border-radius:6px;
                     padding:6px;">
-                    <b>{pct}%</b><br>
+                    <b>{pct}%</b>{model_label}<br>
                     <span style='font-size:12px;color:gray;'>{names or '-'}</span>
                 </div>
                 """,
@@ -193,6 +232,7 @@ for i, match in enumerate(matches):
     # Store the prediction in the main dict for saving
     current_predictions_for_saving[match_id_str] = {
         "match": match_name,
+        "match_id": match["match_id"],
         "home_team": home_team,
         "away_team": away_team,
         "prediction": current_selected_prediction or "", # Store the selected value
@@ -223,6 +263,7 @@ if st.button("💾 Save Predictions"):
         predictions_to_save = {
             match_id: {
                 "match": details["match"],
+                "match_id": details["match_id"],
                 "home_team": details["home_team"],
                 "away_team": details["away_team"],
                 "prediction": details["prediction"]
@@ -230,16 +271,19 @@ if st.button("💾 Save Predictions"):
             for match_id, details in current_predictions_for_saving.items()
             if details["prediction"] # Ensure only non-empty predictions are saved
         }
-        print("Predictions to save:", predictions_to_save) # For debugging
-        save_predictions_db(st.session_state.selected_username, matchday['number'], predictions_to_save)
+        save_predictions_db(st.session_state.selected_username, matchday['number'], predictions_to_save, pool_id)
         st.success("✅ Predictions saved successfully!")
 
+pending = get_pending_saves()
+if pending:
+    st.caption(f"⏳ {pending} saved prediction(s) still syncing with the database.")
+
 # --- Statistics ---
 st.subheader("📊 Statistics")
 
 # --- Number of users who answered ---
-num_users = get_number_of_users(matchday['number']) # Use cached function
-total_users = len(get_existing_users())
+num_users = get_number_of_users(matchday['number'], pool_id) # Use cached function
+total_users = len(cached_get_existing_users(pool_id))
 st.metric(
     label="Number of users who have answered",
     value=f"{num_users} / {total_users}"
@@ -248,5 +292,5 @@ st.metric(
 # ---------------- JACKPOT ----------------
 st.subheader("💰 Current Jackpot")
 
-jackpot_value = get_jackpot_for_matchday(matchday["number"])
+jackpot_value = get_jackpot_for_matchday(matchday["number"], pool_id)
 st.metric(label=f"Total Jackpot for Jornada {matchday['number']}", value=f"{jackpot_value} €")
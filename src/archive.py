@@ -0,0 +1,146 @@
+import argparse
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from db.pipeline import log
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = BASE_DIR / "data" / "archive"
+# Partitions are written here first, outside every dataset root, then moved into place
+STAGING_DIR = ARCHIVE_DIR / ".staging"
+
+# Tables kept in the archive, one dataset per table:
+# data/archive/<table>/season=<season>/competition=<competition>/part-0.parquet
+#
+#   python src/archive.py                                  # seasons stored
+#   python src/archive.py results --season 2425 [--competition ...] [--columns jornada result]
+TABLES = ("calendars", "results", "predictions", "standings")
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("season", pa.string()), ("competition", pa.string())]),
+    flavor="hive",
+)
+
+# https://www.fcf.cat/calendari/<season>/futbol-sala/<league>/<group>
+URL_PATTERN = re.compile(r"/calendari/(?P<season>\d+)/[^/]+/(?P<league>[^/]+)/(?P<group>[^/?#]+)")
+
+
+def season_from_url(url):
+    """Return (season, competition) from an FCF calendar URL, e.g. ("2526", "lliga-...-bcn-gr11")."""
+    match = URL_PATTERN.search(url)
+    if not match:
+        raise ValueError(f"Not an FCF calendar URL: {url}")
+    return match["season"], f"{match['league']}-{match['group']}"
+
+
+def write_partition(table, season, competition, records):
+    """Replace one season/competition partition of an archive table with `records`."""
+    if table not in TABLES:
+        raise ValueError(f"Unknown archive table: {table}")
+
+    df = pd.DataFrame(records)
+    partition_dir = ARCHIVE_DIR / table / f"season={season}" / f"competition={competition}"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+
+    # Write on the same filesystem and swap, so readers never see half a partition
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    target = partition_dir / "part-0.parquet"
+    tmp = STAGING_DIR / f"{table}-{season}-{competition}.parquet"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+    tmp.replace(target)
+    return len(df)
+
+
+def archive_calendar(season_model, season, competition):
+    """Archive the normalized calendar and its 1/X/2 results."""
+    calendar, results = [], []
+    for jornada in season_model.jornadas:
+        for match in jornada.matches:
+            calendar.append({
+                "jornada": match.jornada,
+                "match_id": match.id,
+                "date": jornada.date.isoformat() if jornada.date else None,
+                "home_team": match.home_team,
+                "home_team_id": match.home_id,
+                "away_team": match.away_team,
+                "away_team_id": match.away_id,
+                "home_score": match.home_score,
+                "away_score": match.away_score,
+                "match_report": match.match_report,
+            })
+            results.append({
+                "jornada": match.jornada,
+                "match_id": match.id,
+                "home_team": match.home_team,
+                "away_team": match.away_team,
+                "result": match.result,
+            })
+
+    write_partition("calendars", season, competition, calendar)
+    write_partition("results", season, competition, results)
+    log(f"✅ Archived {len(calendar)} matches for season {season} ({competition}).")
+
+
+def _to_expression(filters):
+    """Turn [(column, op, value), ...] (AND-ed) into a pyarrow expression."""
+    ops = {
+        "==": lambda f, v: f == v,
+        "!=": lambda f, v: f != v,
+        "<": lambda f, v: f < v,
+        "<=": lambda f, v: f <= v,
+        ">": lambda f, v: f > v,
+        ">=": lambda f, v: f >= v,
+        "in": lambda f, v: f.isin(list(v)),
+    }
+    expression = None
+    for column, op, value in filters:
+        term = ops[op](ds.field(column), value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def read_archive(table, columns=None, filters=None):
+    """
+    Read an archive table as a DataFrame.
+    Only the requested `columns` are loaded, and `filters` ([(column, op, value)], AND-ed)
+    are pushed down to the files: partitions for other seasons/competitions are never opened
+    and row groups are skipped using Parquet statistics.
+
+        read_archive("results", columns=["jornada", "result"], filters=[("season", ">=", "2324")])
+    """
+    path = ARCHIVE_DIR / table
+    if not path.exists():
+        return pd.DataFrame(columns=columns)
+
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+    expression = _to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def list_seasons(table="calendars"):
+    """Return the (season, competition) pairs stored for an archive table."""
+    df = read_archive(table, columns=["season", "competition"])
+    return sorted(set(zip(df["season"], df["competition"])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List archived seasons or print one archive table.")
+    parser.add_argument("table", nargs="?", choices=TABLES)
+    parser.add_argument("--season")
+    parser.add_argument("--competition")
+    parser.add_argument("--columns", nargs="+")
+    args = parser.parse_args()
+
+    if args.table is None:
+        for season, competition in list_seasons():
+            print(f"🔹 {season}  {competition}")
+    else:
+        filters = [(column, "==", value) for column, value in
+                   (("season", args.season), ("competition", args.competition)) if value]
+        df = read_archive(args.table, columns=args.columns, filters=filters or None)
+        print(df.to_string(index=False) if not df.empty else "No archived rows.")
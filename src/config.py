@@ -1,5 +1,11 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data" / "futbolcalendar"
 DATA_FILE = DATA_DIR / "futsal_calendar.json"
+
+# Interface the snapshot, page and metrics servers listen on. Localhost by default: the
+# snapshots publish everyone's picks with CORS *, so exposing them is a deliberate choice
+# (FCF_BIND_HOST=0.0.0.0, e.g. inside Docker behind a published port)
+BIND_HOST = os.getenv("FCF_BIND_HOST", "127.0.0.1")
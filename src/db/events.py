@@ -0,0 +1,235 @@
+import argparse
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.paging import fetch_all
+from metrics import inc
+from db.pipeline import log
+
+# --- Prediction event log ---
+# Every save is appended to prediction_events (one row per pick, all sharing the save's
+# save_id and saved_at) and never changed afterwards. compact_predictions() folds new
+# events into `predictions`, the materialized latest save per (pool, jornada, user) that
+# every reader in logic.py queries. picks_at() and save_history() answer audit questions
+# straight from the log.
+#
+#   python src/db/events.py compact
+#   python src/db/events.py audit --pool 1 --jornada 5 --at 2025-11-08T18:00:00 [--user Adri]
+
+# Events from another process may be recorded slightly out of clock order; compaction
+# rereads this much before its watermark (re-folding an event is a no-op)
+OVERLAP = timedelta(minutes=10)
+
+# Compaction runs in the app (every 30 s), the outbox flusher and each refresh; a lease on
+# the prediction_compaction row lets one of them at a time fold events, the others skip.
+# A holder that dies frees the lease when it expires.
+LEASE = timedelta(minutes=5)
+
+PREDICTION_COLUMNS = ("pool_id", "username", "jornada", "match_id", "home_team", "away_team", "prediction")
+PREDICTION_KEY = "pool_id,jornada,username,home_team,away_team"  # primary key of predictions
+
+
+def event_rows(save_id, pool_id, username, jornada, records, recorded_at=None):
+    """prediction_events rows for one save (`records` as built by save_predictions_db)."""
+    recorded_at = recorded_at or datetime.utcnow().isoformat()
+    return [
+        {
+            "save_id": save_id, "pool_id": pool_id, "username": username, "jornada": jornada,
+            "saved_at": r.get("timestamp") or recorded_at, "recorded_at": recorded_at,
+            "match_id": r.get("match_id"), "home_team": r["home_team"], "away_team": r["away_team"],
+            "prediction": r["prediction"],
+        }
+        for r in records
+    ]
+
+
+def _latest_saves(events):
+    """{(pool_id, jornada, username): (saved_at, save_id)} of the newest save in `events`."""
+    latest = {}
+    for e in events:
+        key = (e["pool_id"], e["jornada"], e["username"])
+        save = (e["saved_at"], e["save_id"])
+        if key not in latest or save > latest[key]:
+            latest[key] = save
+    return latest
+
+
+def _acquire_lease(supabase, holder):
+    """Take the compaction lease if it is free or expired; True when `holder` now has it."""
+    now = datetime.utcnow()
+    taken = (
+        supabase.table("prediction_compaction")
+        .update({"holder": holder, "lease_until": (now + LEASE).isoformat()})
+        .eq("id", 1).lt("lease_until", now.isoformat())
+        .execute()
+    )
+    return bool(taken.data)
+
+
+def _release_lease(supabase, holder):
+    supabase.table("prediction_compaction").update({"lease_until": ""}).eq("id", 1).eq("holder", holder).execute()
+
+
+def compact_predictions(supabase):
+    """
+    Fold events recorded since the last compaction into `predictions`: the users whose
+    newest save is newer than their materialized picks get them replaced (one upsert,
+    then a delete per save of the picks it dropped). Returns the ids of the pools that
+    changed. Runs under the compaction lease; if another process holds it, returns []
+    without compacting.
+    """
+    holder = uuid.uuid4().hex
+    if not _acquire_lease(supabase, holder):
+        log("🔹 Compaction already running elsewhere, skipped.")
+        return []
+
+    try:
+        state = supabase.table("prediction_compaction").select("recorded_at").eq("id", 1).execute().data
+        watermark = state[0]["recorded_at"] if state else ""
+        since = (datetime.fromisoformat(watermark) - OVERLAP).isoformat() if watermark else ""
+
+        events = fetch_all(lambda: (
+            supabase.table("prediction_events")
+            .select("pool_id, jornada, username, save_id, saved_at, recorded_at")
+            .gt("recorded_at", since)
+            .order("recorded_at").order("save_id").order("home_team").order("away_team")
+        ))
+        if not events:
+            return []
+
+        # Keep only saves newer than what predictions already holds for that user
+        latest = _latest_saves(events)
+        groups = {}
+        for pool_id, jornada, username in latest:
+            groups.setdefault((pool_id, jornada), []).append(username)
+
+        stale = {}
+        for (pool_id, jornada), users in groups.items():
+            current = {
+                row["username"]: row["timestamp"] or ""
+                for row in fetch_all(lambda: (
+                    supabase.table("predictions").select("username, timestamp")
+                    .eq("pool_id", pool_id).eq("jornada", jornada).in_("username", users)
+                    .order("username").order("home_team").order("away_team")
+                ))
+            }
+            newer = [u for u in users if latest[(pool_id, jornada, u)][0] > current.get(u, "")]
+            if newer:
+                stale[(pool_id, jornada)] = newer
+
+        if stale:
+            save_ids = [latest[(pool_id, jornada, u)][1] for (pool_id, jornada), users in stale.items() for u in users]
+            rows = fetch_all(lambda: (
+                supabase.table("prediction_events")
+                .select(", ".join(PREDICTION_COLUMNS + ("saved_at",)))
+                .in_("save_id", save_ids)
+                .order("save_id").order("home_team").order("away_team")
+            ))
+            # Overwrite picks in place, then drop the ones the new saves left out (older
+            # timestamps), so readers never see a user without picks in between
+            supabase.table("predictions").upsert(
+                [{**{c: r[c] for c in PREDICTION_COLUMNS}, "timestamp": r["saved_at"]} for r in rows],
+                on_conflict=PREDICTION_KEY,
+            ).execute()
+            inc("fcf_rows_written_total", len(rows), table="predictions")
+            for (pool_id, jornada), users in stale.items():
+                by_save = {}
+                for u in users:
+                    by_save.setdefault(latest[(pool_id, jornada, u)][0], []).append(u)
+                for saved_at, savers in by_save.items():
+                    (
+                        supabase.table("predictions").delete()
+                        .eq("pool_id", pool_id).eq("jornada", jornada).in_("username", savers)
+                        .lt("timestamp", saved_at)
+                        .execute()
+                    )
+                # Picks saved before timestamps existed
+                (
+                    supabase.table("predictions").delete()
+                    .eq("pool_id", pool_id).eq("jornada", jornada).in_("username", users)
+                    .is_("timestamp", "null")
+                    .execute()
+                )
+
+        supabase.table("prediction_compaction").update(
+            {"recorded_at": max(e["recorded_at"] for e in events)}
+        ).eq("id", 1).execute()
+
+        changed = sorted({pool_id for pool_id, _ in stale})
+        log(f"✅ Compacted {len(events)} prediction events, {sum(map(len, stale.values()))} saves materialized.")
+        return changed
+
+    finally:
+        try:
+            _release_lease(supabase, holder)
+        except Exception as e:
+            log(f"⚠️ Error releasing the compaction lease: {e}")
+
+
+def _events(supabase, pool_id, jornada, moment=None, username=None):
+    def query():
+        q = supabase.table("prediction_events").select("*").eq("pool_id", pool_id).eq("jornada", jornada)
+        if moment:
+            q = q.lte("saved_at", moment)
+        if username:
+            q = q.eq("username", username)
+        return q.order("saved_at").order("save_id").order("home_team").order("away_team")
+    return fetch_all(query)
+
+
+def picks_at(supabase, pool_id, jornada, moment=None, username=None):
+    """
+    Everyone's picks for a pool's jornada as they stood at `moment` (ISO timestamp, now
+    by default): {username: {"saved_at", "save_id", "picks": {(home, away): prediction}}}.
+    """
+    events = _events(supabase, pool_id, jornada, moment, username)
+    latest = _latest_saves(events)
+    picks = {}
+    for e in events:
+        if latest[(e["pool_id"], e["jornada"], e["username"])][1] != e["save_id"]:
+            continue
+        user = picks.setdefault(e["username"], {"saved_at": e["saved_at"], "save_id": e["save_id"], "picks": {}})
+        user["picks"][(e["home_team"], e["away_team"])] = e["prediction"]
+    return picks
+
+
+def save_history(supabase, pool_id, jornada, username):
+    """Every save a user made for a jornada, oldest first, with the picks each one set."""
+    saves = {}
+    for e in _events(supabase, pool_id, jornada, username=username):
+        save = saves.setdefault(e["save_id"], {"saved_at": e["saved_at"], "recorded_at": e["recorded_at"], "picks": {}})
+        save["picks"][(e["home_team"], e["away_team"])] = e["prediction"]
+    return sorted(({"save_id": k, **v} for k, v in saves.items()), key=lambda s: (s["saved_at"], s["save_id"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact the prediction event log or audit picks at a point in time.")
+    parser.add_argument("command", choices=["compact", "audit"])
+    parser.add_argument("--pool", type=int, default=1)
+    parser.add_argument("--jornada", type=int)
+    parser.add_argument("--at", help="ISO timestamp (UTC), now by default")
+    parser.add_argument("--user")
+    args = parser.parse_args()
+
+    from db.offline import offline_enabled, get_offline_client
+    if offline_enabled():
+        client = get_offline_client()
+    else:
+        from supabase import create_client
+        from db.update import get_secret
+        client = create_client(get_secret("SUPABASE_URL"), get_secret("SUPABASE_KEY"))
+
+    if args.command == "compact":
+        compact_predictions(client)
+    elif args.user and not args.at:
+        for save in save_history(client, args.pool, args.jornada, args.user):
+            picks = ", ".join(f"{h} - {a}: {p}" for (h, a), p in sorted(save["picks"].items()))
+            print(f"🔹 {save['saved_at']}  {picks}")
+    else:
+        for user, state in sorted(picks_at(client, args.pool, args.jornada, args.at, args.user).items()):
+            picks = ", ".join(f"{h} - {a}: {p}" for (h, a), p in sorted(state["picks"].items()))
+            print(f"🔹 {user:<12} saved {state['saved_at']}  {picks}")
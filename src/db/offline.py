@@ -0,0 +1,283 @@
+import os
+import random
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+from db.migrations import migrate
+from pools import DEFAULT_POOL
+
+# --- Offline storage stand-in ---
+# A SQLite-backed client exposing the subset of the supabase-py query builder the app uses,
+# so pages and logic can run (and be measured) without a Supabase project.
+# Enable it with FCF_BACKEND=offline; FCF_OFFLINE_DB points to the database file.
+# The schema comes from db/migrations.py, the same one applied to Supabase.
+
+OFFLINE_DB = os.getenv("FCF_OFFLINE_DB", ":memory:")
+
+
+def offline_enabled():
+    return os.getenv("FCF_BACKEND", "").lower() == "offline"
+
+
+class OfflineResult:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class OfflineQuery:
+    """Chainable query mirroring supabase-py: table(...).select(...).eq(...).order(...).execute()"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.orders = []
+        self.limit_value = None
+        self.offset_value = None
+
+    # --- Operations ---
+    def select(self, columns="*", count=None):
+        self.operation = "select"
+        self.columns = ", ".join(c.strip() for c in columns.split(",")) if columns != "*" else "*"
+        return self
+
+    def insert(self, rows):
+        self.operation = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.operation = "upsert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, values):
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    # --- Filters ---
+    def _filter(self, column, op, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "IN", list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, "IS", None if value in (None, "null") else value)
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # --- Modifiers ---
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_value = n
+        return self
+
+    def range(self, start, end):
+        self.offset_value = start
+        self.limit_value = end - start + 1
+        return self
+
+    # --- SQL ---
+    def _where(self):
+        if not self.filters:
+            return "", []
+        clauses, params = [], []
+        for column, op, value in self.filters:
+            if op == "IN":
+                clauses.append(f"{column} IN ({', '.join('?' for _ in value) or 'NULL'})")
+                params.extend(value)
+            elif op == "IS":
+                clauses.append(f"{column} IS NULL" if value is None else f"{column} IS ?")
+                params.extend([] if value is None else [value])
+            else:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _conflict_columns(self, conn):
+        if self.on_conflict:
+            return [c.strip() for c in self.on_conflict.split(",")]
+        info = conn.execute(f"PRAGMA table_info({self.table})").fetchall()
+        return [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class OfflineClient:
+    """Drop-in for supabase.Client backed by SQLite, with call/row counters for budgets and load tests."""
+
+    def __init__(self, path=":memory:"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        self.calls = 0
+        self.rows = 0
+        migrate(self.conn)
+
+    def table(self, name):
+        return OfflineQuery(self, name)
+
+    def reset_stats(self):
+        self.calls = 0
+        self.rows = 0
+
+    def _execute(self, q):
+        where, params = q._where()
+        with self.lock:
+            self.calls += 1
+
+            if q.operation == "select":
+                sql = f"SELECT {q.columns} FROM {q.table}{where}"
+                if q.orders:
+                    sql += " ORDER BY " + ", ".join(f"{c} {'DESC' if d else 'ASC'}" for c, d in q.orders)
+                if q.limit_value is not None:
+                    sql += f" LIMIT {int(q.limit_value)}"
+                    if q.offset_value:
+                        sql += f" OFFSET {int(q.offset_value)}"
+                data = [dict(r) for r in self.conn.execute(sql, params).fetchall()]
+                self.rows += len(data)
+                return OfflineResult(data, len(data))
+
+            if q.operation in ("insert", "upsert"):
+                if not q.payload:
+                    return OfflineResult([])
+                columns = list(q.payload[0].keys())
+                sql = (
+                    f"INSERT INTO {q.table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})"
+                )
+                if q.operation == "upsert":
+                    conflict = q._conflict_columns(self.conn)
+                    updates = [c for c in columns if c not in conflict]
+                    sql += f" ON CONFLICT ({', '.join(conflict)}) DO " + (
+                        "UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates) if updates else "NOTHING"
+                    )
+                self.conn.executemany(sql, [[row.get(c) for c in columns] for row in q.payload])
+                self.conn.commit()
+                self.rows += len(q.payload)
+                return OfflineResult(q.payload)
+
+            if q.operation == "update":
+                sets = ", ".join(f"{c} = ?" for c in q.payload)
+                updated = self.conn.execute(f"UPDATE {q.table} SET {sets}{where}", list(q.payload.values()) + params).rowcount
+                self.conn.commit()
+                return OfflineResult([q.payload] * updated)  # like PostgREST, one row per updated row
+
+            if q.operation == "delete":
+                self.conn.execute(f"DELETE FROM {q.table}{where}", params)
+                self.conn.commit()
+                return OfflineResult([])
+
+        raise ValueError(f"Unsupported operation: {q.operation}")
+
+
+_client = None
+
+
+def get_offline_client():
+    """Return the process-wide offline client."""
+    global _client
+    if _client is None:
+        _client = OfflineClient(OFFLINE_DB)
+    return _client
+
+
+# --- Seeding ---
+def seed_offline(client, season, users, today=None, seed=0, pool_id=DEFAULT_POOL):
+    """
+    Fill an offline database from the season model with synthetic predictions for the
+    members (`users`) of one pool; other pools' picks are kept. Dates are shifted so the first jornada without any result is the upcoming one,
+    which keeps the pages meaningful whatever today's date is.
+    """
+    from db.update import compute_classification
+
+    today = today or date.today()
+    rng = random.Random(seed)
+
+    upcoming = next(
+        (j for j in season.jornadas if j.date and not any(m.played for m in j.matches)),
+        season.jornadas[-1],
+    )
+    shift = (today + timedelta(days=3)) - upcoming.date
+
+    for table in ("results", "teams", "classification", "matchdays", "rating_history", "team_ratings"):
+        client.table(table).delete().execute()
+    for table in ("predictions", "prediction_events", "jackpot", "winners", "user_timeline", "timeline_jornadas", "pool_members"):
+        client.table(table).delete().eq("pool_id", pool_id).execute()
+
+    if not client.table("pools").select("id").eq("id", pool_id).execute().data:
+        client.table("pools").insert({"id": pool_id, "name": f"Pool {pool_id}"}).execute()
+    client.table("pool_members").insert([{"pool_id": pool_id, "username": u} for u in users]).execute()
+
+    client.table("matchdays").insert([
+        {"number": j.number, "date": (j.date + shift).isoformat()} for j in season.jornadas if j.date
+    ]).execute()
+    client.table("teams").insert([{"id": t.id, "name": t.name, "logo": t.logo} for t in season.teams.values()]).execute()
+    client.table("results").insert([
+        {"matchday": m.jornada, "match_id": m.id, "home_team": m.home_team, "home_team_id": m.home_id,
+         "away_team": m.away_team, "away_team_id": m.away_id, "result": m.result}
+        for m in season.matches
+    ]).execute()
+    client.table("classification").insert(compute_classification(season)).execute()
+
+    timestamp = datetime.utcnow().isoformat()
+    predictions = [
+        {"pool_id": pool_id, "username": u, "jornada": m.jornada, "timestamp": timestamp, "match_id": m.id,
+         "home_team": m.home_team, "away_team": m.away_team, "prediction": rng.choice("1X2")}
+        for j in season.jornadas if j.number <= upcoming.number
+        for m in j.matches
+        for u in users
+    ]
+    client.table("predictions").insert(predictions).execute()
+    client.table("prediction_events").insert([
+        {"save_id": f"seed-{pool_id}-{p['jornada']}-{p['username']}", "saved_at": timestamp, "recorded_at": timestamp,
+         **{k: v for k, v in p.items() if k != "timestamp"}}
+        for p in predictions
+    ]).execute()
+
+    client.table("jackpot").insert([
+        {"pool_id": pool_id, "matchday": j.number, "accumulated": len(users) * i}
+        for i, j in enumerate(season.jornadas) if j.number <= upcoming.number
+    ]).execute()
+
+    client.reset_stats()
+    return upcoming.number
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from pools import DEFAULT_POOL
+from metrics import inc
+from db.events import event_rows, compact_predictions
+from db.offline import offline_enabled
+
+# --- Write-ahead log for prediction saves ---
+# Saves are appended (and fsynced) to a local JSON-lines file and acknowledged right away.
+# A background thread appends them to the prediction event log in batches; if the database
+# is down the entries simply stay in the log until a later flush succeeds. A save the
+# database keeps rejecting while it accepts others is moved to a quarantine file after
+# MAX_ATTEMPTS flushes, so it can't hold up the saves queued behind it.
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+OUTBOX_DIR = BASE_DIR / "data" / "outbox"
+# The offline stand-in gets its own log, so test runs never drain real saves into it
+OUTBOX_FILE = OUTBOX_DIR / ("offline.wal" if offline_enabled() else "predictions.wal")
+QUARANTINE_FILE = OUTBOX_DIR / "quarantine.jsonl"
+
+FLUSH_INTERVAL = 2  # seconds
+MAX_ATTEMPTS = 5
+# Readers cache picks for a minute anyway, so folding events more often buys nothing
+COMPACT_INTERVAL = 30  # seconds
+
+_lock = threading.Lock()
+_flusher = None
+
+
+def enqueue_save(username, jornada, records, pool_id=DEFAULT_POOL):
+    """Durably record a save (all picks of a user for a jornada in a pool) and return immediately."""
+    entry = {
+        "id": uuid.uuid4().hex,
+        "queued_at": datetime.utcnow().isoformat(),
+        "pool_id": pool_id,
+        "username": username,
+        "jornada": jornada,
+        "records": records,
+    }
+    with _lock:
+        OUTBOX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(OUTBOX_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    return entry["id"]
+
+
+def _read_entries():
+    if not OUTBOX_FILE.exists():
+        return []
+    entries = []
+    with open(OUTBOX_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a crash mid-write; the save was never acknowledged
+                continue
+    return entries
+
+
+def _coalesce(entries):
+    """Keep only the latest save per (pool, username, jornada); a save replaces all earlier picks."""
+    latest = {}
+    for entry in entries:
+        # Entries queued before pools existed belong to the default pool
+        latest[(entry.get("pool_id", DEFAULT_POOL), entry["username"], entry["jornada"])] = entry
+    return latest
+
+
+def pending_saves():
+    """Number of (pool, user, jornada) saves still waiting to reach the database."""
+    with _lock:
+        return len(_coalesce(_read_entries()))
+
+
+def _rows(entry, recorded_at):
+    return event_rows(entry["id"], entry.get("pool_id", DEFAULT_POOL), entry["username"],
+                      entry["jornada"], entry["records"], recorded_at)
+
+
+def _write(supabase, rows):
+    if rows:
+        # Upsert on the event key, so a retry after a crash mid-flush can't duplicate a save
+        supabase.table("prediction_events").upsert(rows, on_conflict="save_id,home_team,away_team").execute()
+        inc("fcf_rows_written_total", len(rows), table="prediction_events")
+
+
+def _reachable(supabase):
+    try:
+        supabase.table("prediction_compaction").select("id").eq("id", 1).execute()
+        return True
+    except Exception:
+        return False
+
+
+def _rewrite(entries):
+    tmp = OUTBOX_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(OUTBOX_FILE)
+
+
+def _quarantine(entries):
+    with open(QUARANTINE_FILE, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def flush(supabase):
+    """
+    Append queued saves to the prediction event log in one batched insert (every save,
+    superseded ones included, so the log keeps the full history). Returns the ids of the
+    pools written to; db/events.py compacts the events into `predictions`.
+    """
+    with _lock:
+        entries = _read_entries()
+    if not entries:
+        return []
+
+    recorded_at = datetime.utcnow().isoformat()
+    written, rejected = entries, []
+    try:
+        _write(supabase, [row for entry in entries for row in _rows(entry, recorded_at)])
+    except Exception as e:
+        # Find out which saves the database refuses, one upsert each
+        written = []
+        for entry in entries:
+            try:
+                _write(supabase, _rows(entry, recorded_at))
+                written.append(entry)
+            except Exception as entry_error:
+                rejected.append({**entry, "attempts": entry.get("attempts", 0) + 1, "error": str(entry_error)})
+        if not written and not _reachable(supabase):
+            print(f"⚠️ Error flushing prediction outbox ({len(entries)} saves kept): {e}")
+            return []
+
+    # Drop what we wrote, keeping rejected saves for another try and anything queued meanwhile
+    quarantined = [entry for entry in rejected if entry["attempts"] >= MAX_ATTEMPTS]
+    with _lock:
+        remaining = _read_entries()[len(entries):]
+        if quarantined:
+            _quarantine(quarantined)
+        _rewrite([entry for entry in rejected if entry["attempts"] < MAX_ATTEMPTS] + remaining)
+
+    if rejected:
+        print(f"⚠️ {len(rejected)} prediction saves rejected, {len(quarantined)} moved to {QUARANTINE_FILE.name}.")
+    if written:
+        print(f"✅ Flushed {len(written)} prediction saves to the event log.")
+    return sorted({entry.get("pool_id", DEFAULT_POOL) for entry in written})
+
+
+def start_flusher(supabase, on_flush=None, interval=FLUSH_INTERVAL, compact_interval=COMPACT_INTERVAL):
+    """
+    Start the background flusher once per process. Saves reach the event log every
+    `interval` seconds and are compacted into `predictions` at most every `compact_interval`;
+    `on_flush` gets the pool ids whose picks changed.
+    """
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return _flusher
+
+    def run():
+        dirty, last_compaction = False, time.monotonic()
+        while True:
+            time.sleep(interval)
+            try:
+                dirty = bool(flush(supabase)) or dirty
+                if dirty and time.monotonic() - last_compaction >= compact_interval:
+                    pools = compact_predictions(supabase)
+                    dirty, last_compaction = False, time.monotonic()
+                    if pools and on_flush:
+                        on_flush(pools)
+            except Exception as e:
+                print(f"⚠️ Error in prediction flusher: {e}")
+
+    _flusher = threading.Thread(target=run, name="prediction-flusher", daemon=True)
+    _flusher.start()
+    return _flusher
@@ -0,0 +1,32 @@
+# --- Paginated streaming reader ---
+# PostgREST caps every response (1000 rows by default), so a plain .select().execute()
+# on a growing table silently truncates. stream_rows() walks the table page by page with
+# range pagination over a stable order and yields rows one at a time, so callers can
+# aggregate in constant memory.
+
+PAGE_SIZE = 1000
+
+
+def stream_rows(query, page_size=PAGE_SIZE):
+    """
+    Yield every row of a query, fetching `page_size` rows per request.
+
+    `query` is a zero-argument callable returning a fresh query builder with its select,
+    filters and an ORDER BY that makes the row order stable (pagination needs it), e.g.
+
+        stream_rows(lambda: supabase.table("predictions")
+                    .select("username, prediction").eq("jornada", 3)
+                    .order("username").order("home_team"))
+    """
+    start = 0
+    while True:
+        page = query().range(start, start + page_size - 1).execute().data or []
+        yield from page
+        if len(page) < page_size:
+            return
+        start += page_size
+
+
+def fetch_all(query, page_size=PAGE_SIZE):
+    """All rows of a query as a list, for small tables that must not be truncated either."""
+    return list(stream_rows(query, page_size))
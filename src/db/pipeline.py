@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+
+from metrics import observe
+from profiling import profiled
+
+# --- Refresh pipeline ---
+# update_data is a small DAG: every stage declares the stages it needs, and a stage starts
+# as soon as those are done, so independent writes (matchdays, teams, results,
+# classification) overlap instead of queuing behind each other. Stages run on threads;
+# they spend their time waiting on the database, not on the GIL.
+#
+#   FCF_SKIP_STAGES=archive,snapshots python src/main.py
+#
+# skips stages by name; a skipped stage counts as done for the stages that depend on it,
+# unless one of them reads its output (`reads`), in which case the run is refused.
+# Stages report through log(), so lines from concurrent stages never interleave, and
+# raise on failure: the pipeline logs the error and doesn't run the stages that need them.
+
+MAX_WORKERS = 4
+
+_log_lock = threading.Lock()
+
+
+@dataclass(slots=True, frozen=True)
+class Stage:
+    name: str
+    run: object          # callable(outputs) -> output; `outputs` maps finished stage names to their output
+    deps: tuple = ()
+    reads: tuple = ()    # deps whose output `run` reads; these can't be skipped
+
+
+def log(message):
+    """Print one line of stage output in a single write."""
+    with _log_lock:
+        sys.stdout.write(f"{message}\n")
+        sys.stdout.flush()
+
+
+def skipped_stages():
+    """Stage names listed in FCF_SKIP_STAGES (comma separated)."""
+    return {name.strip() for name in os.getenv("FCF_SKIP_STAGES", "").split(",") if name.strip()}
+
+
+def _check(stages):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names in {names}")
+    for stage in stages:
+        unknown = set(stage.deps) - set(names)
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages {sorted(unknown)}")
+        undeclared = set(stage.reads) - set(stage.deps)
+        if undeclared:
+            raise ValueError(f"Stage {stage.name} reads stages it doesn't depend on {sorted(undeclared)}")
+
+    # Kahn's algorithm: anything left over sits on a cycle
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def _timed_run(stage, outputs):
+    start = time.perf_counter()
+    try:
+        with profiled(f"update-{stage.name}"):
+            return stage.run(outputs)
+    finally:
+        observe("fcf_update_phase_seconds", time.perf_counter() - start, phase=stage.name)
+
+
+def run_pipeline(stages, skip=(), max_workers=MAX_WORKERS):
+    """
+    Run `stages` concurrently in dependency order. A failing stage is reported and its
+    dependants are not run; the others carry on. Returns ({name: output}, {name: seconds}).
+    Raises ValueError if a skipped stage's output is read by a stage that still runs.
+    """
+    _check(stages)
+    skip = set(skip) | skipped_stages()
+    readers = {}
+    for stage in stages:
+        if stage.name not in skip:
+            for dep in stage.reads:
+                readers.setdefault(dep, []).append(stage.name)
+    refused = sorted(name for name in skip if name in readers)
+    if refused:
+        raise ValueError("Can't skip " + "; ".join(f"{name} (read by {', '.join(readers[name])})" for name in refused))
+    pending = {stage.name: stage for stage in stages}
+    outputs, timings, done, failed = {}, {}, set(), set()
+    running = {}
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="update") as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(dep in failed for dep in stage.deps):
+                    log(f"⚠️ Stage {name} not run: a dependency failed.")
+                    failed.add(name)
+                    del pending[name]
+                elif name in skip and all(dep in done for dep in stage.deps):
+                    log(f"🔹 Stage {name} skipped.")
+                    done.add(name)
+                    del pending[name]
+                elif all(dep in done for dep in stage.deps):
+                    running[pool.submit(_timed_run, stage, dict(outputs))] = (name, time.perf_counter())
+                    del pending[name]
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, start = running.pop(future)
+                timings[name] = time.perf_counter() - start
+                try:
+                    outputs[name] = future.result()
+                    done.add(name)
+                except Exception as e:
+                    log(f"⚠️ Error in stage {name}: {e}")
+                    failed.add(name)
+
+    summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    log(f"🔹 Pipeline finished in {time.perf_counter() - started:.2f}s ({summary})")
+    return outputs, timings
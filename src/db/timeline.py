@@ -0,0 +1,103 @@
+import hashlib
+
+from db.paging import fetch_all
+from metrics import inc
+from db.pipeline import log
+
+# --- Season timeline ---
+# user_timeline holds, per pool, user and decided jornada, the hits of that jornada, the
+# running total and the rank after it, so the rank-over-time chart is a single read.
+# timeline_jornadas remembers a digest of the results each jornada was computed from;
+# a refresh only recomputes from the first jornada whose results changed, reading the
+# hits of that jornada from the jornada_hit_ratios view and everything else from the
+# timeline itself.
+
+
+def results_digest(jornada):
+    """Fingerprint of a jornada's decided results, or None when none is decided yet."""
+    decided = sorted((m.id or 0, m.home_team, m.away_team, m.result) for m in jornada.matches if m.played)
+    if not decided:
+        return None
+    return hashlib.sha1(repr(decided).encode("utf-8")).hexdigest()
+
+
+def rank_users(totals):
+    """Competition ranking (1, 2, 2, 4) by total, highest first: {username: rank}."""
+    ordered = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+    ranks, previous = {}, None
+    for position, (username, total) in enumerate(ordered, start=1):
+        if total != previous:
+            rank, previous = position, total
+        ranks[username] = rank
+    return ranks
+
+
+def _update_pool(season, supabase, pool_id, members, rebuild=False):
+    digests = {j.number: results_digest(j) for j in season.jornadas}
+    digests = {j: d for j, d in digests.items() if d}
+    stored = {} if rebuild else {
+        row["jornada"]: row["results_digest"]
+        for row in fetch_all(lambda: supabase.table("timeline_jornadas").select("jornada, results_digest")
+                             .eq("pool_id", pool_id).order("jornada"))
+    }
+
+    changed = {j for j, d in digests.items() if stored.get(j) != d}
+    dropped = set(stored) - set(digests)  # results withdrawn (a match annulled by FCF)
+    if not changed and not dropped:
+        return 0
+    first = min(changed | dropped)
+    jornadas = sorted(j for j in digests if j >= first)
+
+    # Hits of changed jornadas come from the view, later unchanged ones from the timeline
+    hits = {j: {} for j in jornadas}
+    recomputed = [j for j in jornadas if j in changed]
+    for row in fetch_all(lambda: supabase.table("jornada_hit_ratios").select("username, jornada, hits")
+                         .eq("pool_id", pool_id).in_("jornada", recomputed).order("jornada").order("username")):
+        hits[row["jornada"]][row["username"]] = row["hits"]
+    kept = [j for j in jornadas if j not in changed]
+    if kept:
+        for row in fetch_all(lambda: supabase.table("user_timeline").select("username, jornada, hits")
+                             .eq("pool_id", pool_id).in_("jornada", kept).order("jornada").order("username")):
+            hits[row["jornada"]][row["username"]] = row["hits"]
+
+    # Running totals as they stood after the last untouched jornada
+    totals = {u: 0 for u in members}
+    earlier = [j for j in digests if j < first]
+    if earlier:
+        for row in fetch_all(lambda: supabase.table("user_timeline").select("username, cumulative_hits")
+                             .eq("pool_id", pool_id).eq("jornada", max(earlier)).order("username")):
+            totals[row["username"]] = row["cumulative_hits"]
+
+    rows = []
+    for j in jornadas:
+        for username in hits[j]:
+            totals.setdefault(username, 0)
+        for username in totals:
+            totals[username] += hits[j].get(username, 0)
+        ranks = rank_users(totals)
+        rows.extend(
+            {"pool_id": pool_id, "username": u, "jornada": j, "hits": hits[j].get(u, 0),
+             "cumulative_hits": totals[u], "rank": ranks[u]}
+            for u in sorted(totals)
+        )
+
+    supabase.table("user_timeline").delete().eq("pool_id", pool_id).gte("jornada", first).execute()
+    supabase.table("timeline_jornadas").delete().eq("pool_id", pool_id).gte("jornada", first).execute()
+    if rows:
+        supabase.table("user_timeline").insert(rows).execute()
+        supabase.table("timeline_jornadas").insert(
+            [{"pool_id": pool_id, "jornada": j, "results_digest": digests[j]} for j in jornadas]
+        ).execute()
+        inc("fcf_rows_written_total", len(rows), table="user_timeline")
+    return len(jornadas)
+
+
+def update_timeline(season, supabase, pools, rebuild=False):
+    """
+    Bring every pool's timeline up to date with the season's results. `pools` maps pool
+    ids to members (load_pools); `rebuild` recomputes whole seasons, e.g. after members change.
+    """
+    for pool_id, members in pools.items():
+        count = _update_pool(season, supabase, pool_id, members, rebuild)
+        if count:
+            log(f"✅ Timeline of pool {pool_id} recomputed for {count} jornadas.")
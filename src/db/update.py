@@ -1,16 +1,34 @@
 from pathlib import Path
 from supabase import create_client, Client
 import json
-import pandas as pd
 import os
 import streamlit as st
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from season import build_season
+from standings import Standings
+from ratings import Ratings, finished_matches, replay
+from archive import season_from_url, archive_calendar, write_partition
+from scrap.scraper import URL
+from export import export_snapshots
+from render import render_site
+from simulation import load_or_simulate
+from db.offline import offline_enabled, get_offline_client
+from db.paging import fetch_all
+from pools import DEFAULT_POOL
+from metrics import inc
+from db.pipeline import Stage, run_pipeline, skipped_stages, log
+from db.events import compact_predictions
+from db.timeline import update_timeline
 
 # --- Paths ---
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data" / "futbolcalendar"
 DATA_FILE = DATA_DIR / "futsal_calendar.json"
 
+# Pools exported at the same time by the snapshots stage
+EXPORT_WORKERS = 4
+
 def get_secret(key: str):
     """Try Streamlit secrets first, fallback to .env"""
     try:
@@ -22,397 +40,398 @@ def get_secret(key: str):
     return os.getenv(key)
 
 
-def update_matchdays(data, supabase):
+def update_matchdays(season, supabase):
     """Insert or update matchdays with proper date type."""
-    matchdays = []
-
-    for jornada in data:
-        # Parse date string into Python date object (expected format: DD-MM-YYYY)
-        try:
-            date_obj = datetime.strptime(jornada["date"], "%d-%m-%Y").date()
-        except ValueError:
-            print(f"⚠️ Invalid date format in jornada: {jornada['date']}")
-            continue
-
-        matchdays.append({
-            "number": "".join([c for c in jornada["jornada"] if c.isdigit()]),
-            "date": date_obj.isoformat()  # Send as ISO string (YYYY-MM-DD)
-        })
-
-    # Upsert each jornada
-    for m in matchdays:
-        supabase.table("matchdays").upsert(m, on_conflict="number").execute()
+    matchdays = [
+        {
+            "number": jornada.number,
+            "date": jornada.date.isoformat()  # Send as ISO string (YYYY-MM-DD)
+        }
+        for jornada in season.jornadas
+        if jornada.date is not None
+    ]
 
-    print(f"✅ Matchdays table updated with {len(matchdays)} jornadas.")
+    # One batched upsert for the whole calendar
+    if matchdays:
+        supabase.table("matchdays").upsert(matchdays, on_conflict="number").execute()
+    inc("fcf_rows_written_total", len(matchdays), table="matchdays")
 
+    log(f"✅ Matchdays table updated with {len(matchdays)} jornadas.")
 
-def update_teams_table(data, supabase):
-    # --- TEAMS ---
-    teams = {}
-    for jornada in data:
-        for match in jornada["matches"]:
-            teams[match["home_team"]] = match["home_logo"]
-            teams[match["away_team"]] = match["away_logo"]
 
-    for name, logo in teams.items():
-        supabase.table("teams").upsert({"name": name, "logo": logo}, on_conflict="name").execute()
+def update_teams_table(season, supabase):
+    # --- TEAMS --- (one batched upsert on the registry id, so a respaced name renames the row)
+    supabase.table("teams").upsert(
+        [{"name": team.name, "logo": team.logo, "id": team.id} for team in season.teams.values()],
+        on_conflict="id",
+    ).execute()
+    inc("fcf_rows_written_total", len(season.teams), table="teams")
 
-    print(f"✅ Teams table updated with {len(teams)} teams.")
+    log(f"✅ Teams table updated with {len(season.teams)} teams.")
 
 
-def update_results_table(data, supabase):
+def update_results_table(season, supabase):
     # --- RESULTS ---
-    results = []
-    for jornada in data:
-        for match in jornada["matches"]:
-            res = None
-            if match.get("home_score") is not None and match.get("away_score") is not None:
-                if match["home_score"] > match["away_score"]:
-                    res = "1"
-                elif match["home_score"] == match["away_score"]:
-                    res = "X"
-                else:
-                    res = "2"
-            results.append({
-                "matchday": "".join([c for c in jornada["jornada"] if c.isdigit()]),
-                "home_team": match["home_team"],
-                "away_team": match["away_team"],
-                "result": res
-            })
+    results = [
+        {
+            "matchday": match.jornada,
+            "match_id": match.id,
+            "home_team": match.home_team,
+            "home_team_id": match.home_id,
+            "away_team": match.away_team,
+            "away_team_id": match.away_id,
+            "result": match.result
+        }
+        for match in season.matches
+    ]
 
     # Optional: remove old results
     supabase.table("results").delete().neq("home_team", "").execute()
 
     # Insert new results
     supabase.table("results").insert(results).execute()
+    inc("fcf_rows_written_total", len(results), table="results")
 
-    print(f"✅ Results table updated with {len(results)} matches.")
+    log(f"✅ Results table updated with {len(results)} matches.")
 
 
 
-def update_classification_table(data, supabase: Client):
+def backfill_prediction_ids(season, supabase, pools=(DEFAULT_POOL,)):
     """
-    Compute and update the classification table in Supabase from the JSON data.
-    Now also includes 'avg_points'.
-    
-    Parameters:
-        data (list): List of jornadas with match results.
-        supabase (Client): Supabase client instance.
+    Give match ids to predictions saved before ids existed (or by an old client).
+    A single probe query when there is nothing to do; otherwise one update per match.
     """
+    missing = (
+        supabase.table("predictions").select("jornada")
+        .in_("pool_id", list(pools)).is_("match_id", "null").limit(1).execute().data
+    )
+    if not missing:
+        return 0
+
+    for match in season.matches:
+        (
+            supabase.table("predictions")
+            .update({"match_id": match.id})
+            .eq("jornada", match.jornada)
+            .eq("home_team", match.home_team)
+            .eq("away_team", match.away_team)
+            .is_("match_id", "null")
+            .execute()
+        )
 
-    # --- Extract results from data ---
-    results = []
-    teams = {}  # Track all teams for initialization
-    for jornada in data:
-        for match in jornada["matches"]:
-            home_score = match.get("home_score")
-            away_score = match.get("away_score")
-
-            # Add team to dict (for classification initialization)
-            teams[match["home_team"]] = match.get("home_logo")
-            teams[match["away_team"]] = match.get("away_logo")
-
-            # Only compute result if scores exist
-            if home_score is not None and away_score is not None:
-                # Convert scores to int if strings
-                home_score = int(home_score)
-                away_score = int(away_score)
-
-                if home_score > away_score:
-                    result = "1"
-                elif home_score == away_score:
-                    result = "X"
-                else:
-                    result = "2"
-            else:
-                result = None
-
-            results.append({
-                "home_team": match["home_team"],
-                "away_team": match["away_team"],
-                "result": result,
-                "home_goals": home_score,
-                "away_goals": away_score
-            })
-
-    # --- Create DataFrame for results ---
-    df_results = pd.DataFrame(results)
-    df_results_played = df_results.dropna(subset=["home_goals", "away_goals"])
-
-    # --- Initialize stats per team ---
-    teams_stats = {
-        team: {
-            "name": team,
-            "home_points": 0, # Renamed from home_points_ratio for clarity during accumulation
-            "away_points": 0, # Renamed from away_points_ratio for clarity during accumulation
-            "total_points": 0, # New: To accumulate total points
-            "played_home": 0,
-            "played_away": 0,
-            "total_goals_favor": 0,
-            "total_goals_against": 0
-        }
-        for team in teams.keys()
-    }
+    log(f"✅ Backfilled match ids on predictions for {len(season.matches)} matches.")
+    return len(season.matches)
 
-    # --- Compute stats ---
-    for _, row in df_results_played.iterrows():
-        home_team = row["home_team"]
-        away_team = row["away_team"]
-        home_goals = row["home_goals"]
-        away_goals = row["away_goals"]
-
-        # Points
-        if home_goals > away_goals:
-            home_points, away_points = 3, 0
-        elif home_goals == away_goals:
-            home_points, away_points = 1, 1
-        else:
-            home_points, away_points = 0, 3
-
-        # Update home stats
-        teams_stats[home_team]["home_points"] += home_points
-        teams_stats[home_team]["total_points"] += home_points # Accumulate total points
-        teams_stats[home_team]["played_home"] += 1
-        teams_stats[home_team]["total_goals_favor"] += home_goals
-        teams_stats[home_team]["total_goals_against"] += away_goals
-
-        # Update away stats
-        teams_stats[away_team]["away_points"] += away_points
-        teams_stats[away_team]["total_points"] += away_points # Accumulate total points
-        teams_stats[away_team]["played_away"] += 1
-        teams_stats[away_team]["total_goals_favor"] += away_goals
-        teams_stats[away_team]["total_goals_against"] += home_goals
-
-    # --- Compute averages ---
-    classification_records = []
-    for stats in teams_stats.values():
-        played_home = stats["played_home"]
-        played_away = stats["played_away"]
-        played_total = played_home + played_away # Total games played by this team
-
-        # Calculate avg_points
-        total_points = stats["total_points"]
-        avg_points = round(total_points / played_total, 2) if played_total > 0 else 0
-
-        record = {
-            "name": stats["name"],
-            # These are now actual points accumulated, not ratios yet. Renamed for clarity in DB.
-            #"home_points_total": stats["home_points"], # New field for total home points
-            #"away_points_total": stats["away_points"], # New field for total away points
-            "home_points_ratio": round(stats["home_points"] / played_home, 2) if played_home > 0 else 0,
-            "away_points_ratio": round(stats["away_points"] / played_away, 2) if played_away > 0 else 0,
-            "avg_goals_favor": round(stats["total_goals_favor"] / max(played_total, 1), 2),
-            "avg_goals_against": round(stats["total_goals_against"] / max(played_total, 1), 2),
-            "avg_points": avg_points, # New: Average points per game
-            "total_points": stats["home_points"]+stats["away_points"],
-            "games_played": stats["played_home"] + stats["played_away"]
-        }
-        classification_records.append(record)
 
-    # --- Sort by total points descending ---
-    # Now sorting by the newly calculated avg_points, or total_points if you prefer that for ranking
-    classification_records.sort(key=lambda x: (-x["avg_points"], x["games_played"]))
-    # Or, if you want to sort by total points:
-    # classification_records.sort(key=lambda x: (x["home_points_total"] + x["away_points_total"]), reverse=True)
+# Kept between refreshes, so a long-running scheduler only applies the results that changed
+_standings = None
 
 
-    for i, record in enumerate(classification_records, 1):
-        record["position"] = i
+def compute_classification(season):
+    """
+    Compute the classification records (one per team, with 'position') from the season model,
+    ordered with the federation tiebreaks (standings.py).
+    """
+    global _standings
+    if _standings is None or _standings.teams != season.team_names:
+        _standings = Standings.from_season(season)
+    else:
+        _standings.sync(season)
+    return _standings.records({team.name: team.id for team in season.teams.values()})
 
-    # --- Upsert into Supabase ---
-    for rec in classification_records:
-        supabase.table("classification").upsert(rec, on_conflict="name").execute()
 
-    print(f"✅ Classification table updated with {len(classification_records)} teams.")
+CLASSIFICATION_COLUMNS = (
+    "name, team_id, position, avg_points, total_points, games_played, home_points_ratio, "
+    "away_points_ratio, avg_goals_favor, avg_goals_against"
+)
 
 
-def update_last_refresh(supabase):
-    """
-    Insert a new record into the 'last_refresh' table with the current timestamp.
+def _same_standing(record, stored):
+    """True if a stored classification row already holds the values of `record`."""
+    if stored is None:
+        return False
+    for key, value in record.items():
+        old = stored.get(key)
+        if isinstance(value, float) or isinstance(old, float):
+            # numeric columns come back as floats (or strings for numeric types)
+            try:
+                if abs(float(old) - float(value)) > 1e-9:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif old != value:
+            return False
+    return True
+
+
+def update_classification_table(season, supabase: Client):
     """
-    try:
-        # Get the current UTC time in ISO format (you can use local time if you prefer)
-        now = datetime.utcnow().isoformat()
+    Compute and update the classification table in Supabase from the season model.
 
-        data = {"moment": now}
+    Parameters:
+        season (Season): Normalized season built from the scraped JSON.
+        supabase (Client): Supabase client instance.
+    """
+    classification_records = compute_classification(season)
 
-        # Insert into Supabase
-        res = supabase.table("last_refresh").insert(data).execute()
+    # --- Only send teams whose standings changed since the last write ---
+    stored = {
+        row["team_id"]: row
+        for row in fetch_all(lambda: supabase.table("classification").select(CLASSIFICATION_COLUMNS).order("name"))
+    }
+    changed = [rec for rec in classification_records if not _same_standing(rec, stored.get(rec["team_id"]))]
 
-        if res.data:
-            print(f"✅ Last refresh updated at {now}")
-        else:
-            print("⚠️ Insert succeeded but returned no data.")
+    if changed:
+        # Keyed on the team id like teams, so a respaced name updates the team's row
+        supabase.table("classification").upsert(changed, on_conflict="team_id").execute()
+    inc("fcf_rows_written_total", len(changed), table="classification")
 
-    except Exception as e:
-        print(f"❌ Error in update_last_refresh: {e}")
+    skipped = len(classification_records) - len(changed)
+    log(f"✅ Classification table updated: {len(changed)} teams written, {skipped} unchanged skipped.")
+    return classification_records
 
 
+def update_ratings(season, supabase, rebuild=False):
+    """
+    Rate the matches that finished since the last refresh (ratings.py), one O(1) update
+    each, and store their history rows and the touched teams' current rating and form.
+    A corrected or withdrawn result replays the season from scratch, as does `rebuild`.
+    """
+    matches = finished_matches(season)
+    rated = {
+        row["match_id"]: row
+        for row in fetch_all(lambda: supabase.table("rating_history")
+                             .select("match_id, seq, goals_for, goals_against").eq("home", 1).order("seq"))
+    }
+    scores = {m[0]: (m[4], m[5]) for m in matches}
+    corrected = [
+        match_id for match_id, row in rated.items()
+        if scores.get(match_id) != (row["goals_for"], row["goals_against"])
+    ]
+
+    # A postponed match that finished after later ones sorts before them: replay, so the
+    # stored history keeps the same order a rebuild would use
+    unrated = [i for i, m in enumerate(matches) if m[0] not in rated]
+    out_of_order = bool(unrated) and any(m[0] in rated for m in matches[unrated[0]:])
+
+    if rebuild or corrected or out_of_order:
+        ratings, history = replay(matches)
+        supabase.table("rating_history").delete().neq("match_id", -1).execute()
+        supabase.table("team_ratings").delete().neq("team_id", -1).execute()
+        touched = set(ratings.rating)
+        log(f"🔹 Ratings replayed from scratch ({len(corrected)} corrected results, {'a' if out_of_order else 'no'} late match).")
+    else:
+        snapshot = fetch_all(lambda: supabase.table("team_ratings").select("team_id, rating, form, matches").order("team_id"))
+        ratings = Ratings.from_snapshot(snapshot, max((r["seq"] for r in rated.values()), default=0))
+        history = []
+        for match in matches:
+            if match[0] not in rated:
+                history.extend(ratings.apply(*match))
+        touched = {row["team_id"] for row in history}
+
+    if history:
+        supabase.table("rating_history").insert(history).execute()
+        supabase.table("team_ratings").upsert(ratings.snapshot(touched), on_conflict="team_id").execute()
+        inc("fcf_rows_written_total", len(history), table="rating_history")
+    log(f"✅ Ratings updated with {len(history) // 2} matches.")
+    return len(history) // 2
+
+
+def update_archive(season, classification_records, supabase):
+    """Store this season's calendar, results, predictions and standings in the Parquet archive."""
+    season_code, competition = season_from_url(URL)
+    archive_calendar(season, season_code, competition)
+
+    predictions = fetch_all(lambda: (
+        supabase.table("predictions")
+        .select("pool_id, username, jornada, timestamp, match_id, home_team, away_team, prediction")
+        .order("pool_id").order("jornada").order("username").order("home_team")
+    ))
+    write_partition("predictions", season_code, competition, predictions)
+    write_partition("standings", season_code, competition, classification_records)
+
+    log(f"✅ Archive updated with {len(predictions)} predictions.")
 
 
-def winner_in_matchday(matchday, supabase):
+def update_last_refresh(supabase):
     """
-    Return True if at least one user got all predictions correct for this matchday.
-    Also saves winner(s) in the 'winners' table.
+    Insert a new record into the 'last_refresh' table with the current timestamp.
     """
-    try:
-        # --- Get predictions for this jornada ---
-        predictions = (
-            supabase.table("predictions")
-            .select("username, home_team, away_team, prediction")
-            .eq("jornada", matchday)
-            .execute()
-            .data or []
-        )
+    # Get the current UTC time in ISO format (you can use local time if you prefer)
+    now = datetime.utcnow().isoformat()
 
-        # --- Get actual results ---
-        results = (
-            supabase.table("results")
-            .select("home_team, away_team, result")
-            .eq("matchday", matchday)
-            .execute()
-            .data or []
-        )
+    data = {"moment": now}
 
-        if not predictions or not results:
-            return False  # not enough data
+    # Insert into Supabase
+    res = supabase.table("last_refresh").insert(data).execute()
+    inc("fcf_rows_written_total", 1, table="last_refresh")
 
-        # --- Build result lookup map ---
-        result_map = {
-            (r["home_team"], r["away_team"]): r["result"]
-            for r in results
-            if r.get("result")
-        }
+    if res.data:
+        log(f"✅ Last refresh updated at {now}")
+    else:
+        log("⚠️ Insert succeeded but returned no data.")
 
-        total_matches = len(result_map)
-        if total_matches == 0:
-            return False
 
-        # --- Group predictions by user ---
-        user_predictions = {}
-        for p in predictions:
-            user_predictions.setdefault(p["username"], []).append(p)
-
-        winners = []
-
-        # --- Check each user ---
-        for user, preds in user_predictions.items():
-            correct = 0
-            for p in preds:
-                key = (p["home_team"], p["away_team"])
-                if key in result_map and p["prediction"] == result_map[key]:
-                    correct += 1
-            if correct == total_matches:
-                print(f"✅ Winner found in jornada {matchday}: {user}")
-                winners.append(user)
-
-        # --- If there are winners, save them in DB ---
-        if winners:
-            for user in winners:
-                supabase.table("winners").upsert(
-                    {"username": user, "matchday": matchday}
-                ).execute()
-            return True
 
-        return False
 
-    except Exception as e:
-        print(f"⚠️ Error in winner_in_matchday({matchday}): {e}")
-        return False
+def load_pools(supabase):
+    """Every pool with its members: {pool_id: [username, ...]}."""
+    pools = {p["id"]: [] for p in fetch_all(lambda: supabase.table("pools").select("id").order("id"))}
+    for m in fetch_all(lambda: supabase.table("pool_members").select("pool_id, username").order("pool_id").order("username")):
+        pools.setdefault(m["pool_id"], []).append(m["username"])
+    return pools or {DEFAULT_POOL: []}
 
 
-def update_jackpot(supabase):
+def full_house_winners(supabase):
     """
-    Compute jackpot evolution across all matchdays up to today.
-    - Each jornada adds 16 units if no winner.
-    - Resets to 16 when someone wins.
+    Users that hit every decided match of a jornada, for every pool at once (computed by
+    the database): {(pool_id, jornada): [username, ...]}.
     """
-    try:
-        today = datetime.utcnow().strftime("%Y-%m-%d")
-
-        # --- Get all past matchdays ---
-        past_res = (
-            supabase.table("matchdays")
-            .select("number, date")
-            .lt("date", today)
-            .order("date", desc=False)
-            .execute()
-        )
-        past_matchdays = past_res.data or []
-
-        # --- Get the next (upcoming) matchday ---
-        next_res = (
-            supabase.table("matchdays")
-            .select("number, date")
-            .gte("date", today)
-            .order("date", desc=False)
-            .limit(1)
-            .execute()
-        )
-        next_matchday = next_res.data or []
-
-        # --- Combine both lists ---
-        matchdays = past_matchdays + next_matchday
-
-        if not matchdays:
-            print("⚠️ No past jornadas found.")
-            return
+    winners = {}
+    for row in fetch_all(lambda: (
+        supabase.table("jornada_full_house")
+        .select("pool_id, jornada, username")
+        .order("pool_id")
+        .order("jornada")
+        .order("username")
+    )):
+        winners.setdefault((row["pool_id"], row["jornada"]), []).append(row["username"])
+    return winners
+
+
+def update_jackpot(supabase, pools=None):
+    """
+    Compute jackpot evolution across all matchdays up to today, for every pool.
+    - Each jornada adds one unit per pool member (16 in the original pool) if no winner.
+    - Resets to that stake when someone wins.
+    Winners of every pool and jornada are read once, and the jackpot and winners tables
+    are written in one batch each.
+    """
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+
+    # --- Get all past matchdays ---
+    past_res = (
+        supabase.table("matchdays")
+        .select("number, date")
+        .lt("date", today)
+        .order("date", desc=False)
+        .execute()
+    )
+    past_matchdays = past_res.data or []
+
+    # --- Get the next (upcoming) matchday ---
+    next_res = (
+        supabase.table("matchdays")
+        .select("number, date")
+        .gte("date", today)
+        .order("date", desc=False)
+        .limit(1)
+        .execute()
+    )
+    next_matchday = next_res.data or []
+
+    # --- Combine both lists ---
+    matchdays = past_matchdays + next_matchday
+
+    if not matchdays:
+        log("⚠️ No past jornadas found.")
+        return
 
+    full_house = full_house_winners(supabase)
+    jackpot_rows = []
+    winner_rows = []
+    for pool_id, members in (pools or load_pools(supabase)).items():
+        stake = len(members)
         acc = 0
         for i, jornada in enumerate(matchdays):
             num = jornada["number"]
 
-            # For the first jornada, initialize
-            if i == 0:
-                acc = 0
-                supabase.table("jackpot").upsert(
-                    {"matchday": num, "accumulated": acc}
-                ).execute()
-                continue
+            # The first jornada starts the pot; later ones grow it or reset it on a win
+            if i > 0:
+                winners = full_house.get((pool_id, num), [])
+                for user in winners:
+                    log(f"✅ Winner found in jornada {num} (pool {pool_id}): {user}")
+                winner_rows += [{"pool_id": pool_id, "username": user, "matchday": num} for user in winners]
+                acc = stake if winners else acc + stake
 
-            # For subsequent jornadas
-            has_winner = winner_in_matchday(num, supabase)
-            if has_winner:
-                acc = 16
-            else:
-                acc += 16
+            jackpot_rows.append({"pool_id": pool_id, "matchday": num, "accumulated": acc})
 
-            # Insert or update jackpot for this jornada
-            supabase.table("jackpot").upsert(
-                {"matchday": num, "accumulated": acc}
-            ).execute()
+    # --- Insert or update every jornada of every pool at once ---
+    if winner_rows:
+        supabase.table("winners").upsert(winner_rows).execute()
+        inc("fcf_rows_written_total", len(winner_rows), table="winners")
+    supabase.table("jackpot").upsert(jackpot_rows).execute()
+    inc("fcf_rows_written_total", len(jackpot_rows), table="jackpot")
 
-        print("✅ Jackpot table updated successfully.")
+    log("✅ Jackpot table updated successfully.")
 
-    except Exception as e:
-        print(f"⚠️ Error in update_jackpot: {e}")
 
 
-
-def update_data():
-    """Create tables and insert/update teams, results, and classification from JSON."""
+def update_data(skip=()):
+    """
+    Insert/update matchdays, teams, results, classification and jackpot from JSON, then
+    rebuild snapshots and pages. `skip` names pipeline stages to leave out.
+    Returns True when every stage that wasn't skipped succeeded.
+    """
     if not DATA_FILE.exists():
-        print("⚠️ JSON data file not found!")
-        return
+        log("⚠️ JSON data file not found!")
+        return False
 
     with open(DATA_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    # --- Supabase setup ---
-    SUPABASE_URL = get_secret("SUPABASE_URL")
-    SUPABASE_KEY = get_secret("SUPABASE_KEY")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-    # It's already created so we do not need to update it
-
-    #update_matchdays(data, supabase)
-
-    #update_teams_table(data, supabase)
-
-    update_results_table(data, supabase)
+    # Parse once, every writer below consumes the same normalized model
+    season = build_season(data)
 
-    update_classification_table(data, supabase)
-
-    update_jackpot(supabase)
-    
-    update_last_refresh(supabase)
\ No newline at end of file
+    # --- Supabase setup ---
+    if offline_enabled():
+        supabase = get_offline_client()
+    else:
+        SUPABASE_URL = get_secret("SUPABASE_URL")
+        SUPABASE_KEY = get_secret("SUPABASE_KEY")
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    # --- Refresh as a DAG of stages (db/pipeline.py); independent stages overlap ---
+    def export_pool(pool_id, odds):
+        export_snapshots(supabase, pool_id=pool_id)
+        render_site(supabase, pool_id, odds)
+
+    def export_pools(outputs):
+        # Every pool gets its own snapshots and prebuilt pages, in separate folders, so they render side by side;
+        # the pages show the simulation stage's odds (none when that stage is skipped)
+        odds = outputs.get("simulation")
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export") as pool:
+            list(pool.map(lambda pool_id: export_pool(pool_id, odds), outputs["pools"]))
+
+    stages = [
+        Stage("matchdays", lambda _: update_matchdays(season, supabase)),
+        # Teams carry their registry ids, so keep them in sync on every refresh
+        Stage("teams", lambda _: update_teams_table(season, supabase)),
+        Stage("results", lambda _: update_results_table(season, supabase)),
+        Stage("pools", lambda _: load_pools(supabase)),
+        # Saves from apps that haven't compacted yet, so the jackpot sees every pick
+        Stage("compact_predictions", lambda _: compact_predictions(supabase)),
+        Stage("backfill_ids", lambda o: backfill_prediction_ids(season, supabase, o["pools"]),
+              ("pools", "compact_predictions"), reads=("pools",)),
+        Stage("classification", lambda _: update_classification_table(season, supabase)),
+        # Winners come from the views, which join predictions and results on match ids
+        Stage("jackpot", lambda o: update_jackpot(supabase, o["pools"]),
+              ("matchdays", "results", "backfill_ids", "pools"), reads=("pools",)),
+        Stage("ratings", lambda _: update_ratings(season, supabase)),
+        Stage("timeline", lambda o: update_timeline(season, supabase, o["pools"]),
+              ("results", "backfill_ids", "pools"), reads=("pools",)),
+        Stage("archive", lambda o: update_archive(season, o.get("classification") or compute_classification(season), supabase),
+              ("classification", "backfill_ids")),
+        Stage("last_refresh", lambda _: update_last_refresh(supabase),
+              ("matchdays", "teams", "results", "classification", "ratings", "jackpot")),
+        # Final position odds, handed to the prebuilt statistics pages
+        Stage("simulation", lambda _: load_or_simulate(data)),
+        Stage("snapshots", export_pools, ("pools", "timeline", "last_refresh", "simulation"), reads=("pools",)),
+    ]
+    try:
+        outputs, _ = run_pipeline(stages, skip=skip)
+    except ValueError as e:
+        log(f"❌ Error in update_data: {e}")
+        return False
+    skipped = set(skip) | skipped_stages()
+    return all(stage.name in outputs or stage.name in skipped for stage in stages)
@@ -0,0 +1,73 @@
+import sys
+
+# --- Server-side aggregations ---
+# Leaderboard, hit ratios, pick distribution and full-house winners as SQL views, so the
+# database does the grouping and logic only fetches the small result sets (PostgREST
+# exposes views like tables: supabase.table("user_hits").select(...)).
+# The SQL sticks to what Postgres and SQLite both understand; the offline stand-in
+# creates the same views, so budgets and benchmarks measure the real queries.
+#
+# db/migrations.py recreates them after every migration; `python src/db/views.py` prints the SQL.
+
+# Every view is per pool (pool_id column). Views in dependency order (a view may only use the ones above it)
+VIEWS = {
+    # One row per pick of a known match, with 1 when it matches the final result
+    "prediction_hits": """
+        SELECT p.pool_id, p.username, p.jornada, p.match_id, p.home_team, p.away_team, p.prediction, r.result,
+               CASE WHEN r.result IS NOT NULL AND p.prediction = r.result THEN 1 ELSE 0 END AS hit
+        FROM predictions p
+        JOIN results r ON r.match_id = p.match_id
+        WHERE p.prediction IN ('1', 'X', '2')
+    """,
+    # Season leaderboard: users with at least one hit
+    "user_hits": """
+        SELECT pool_id, username, SUM(hit) AS hits
+        FROM prediction_hits
+        GROUP BY pool_id, username
+        HAVING SUM(hit) > 0
+    """,
+    # Correct picks over picks made, per user and jornada
+    "jornada_hit_ratios": """
+        SELECT pool_id, username, jornada, COUNT(*) AS picks, SUM(hit) AS hits,
+               1.0 * SUM(hit) / COUNT(*) AS hit_ratio
+        FROM prediction_hits
+        GROUP BY pool_id, username, jornada
+    """,
+    # Users that hit every decided match of a jornada
+    "jornada_full_house": """
+        SELECT h.pool_id, h.username, h.jornada
+        FROM prediction_hits h
+        GROUP BY h.pool_id, h.username, h.jornada
+        HAVING SUM(h.hit) = (
+            SELECT COUNT(*) FROM results r WHERE r.matchday = h.jornada AND r.result IS NOT NULL
+        ) AND SUM(h.hit) > 0
+    """,
+    # How many users picked each outcome of a match
+    "prediction_distribution": """
+        SELECT pool_id, match_id, prediction, COUNT(*) AS picks
+        FROM predictions
+        WHERE prediction IN ('1', 'X', '2') AND match_id IS NOT NULL
+        GROUP BY pool_id, match_id, prediction
+    """,
+    # Users with picks per jornada
+    "jornada_users": """
+        SELECT pool_id, jornada, COUNT(DISTINCT username) AS users
+        FROM predictions
+        GROUP BY pool_id, jornada
+    """,
+}
+
+
+def drop_views_sql():
+    """DROP statements for every view, dependants first."""
+    return "\n".join(f"DROP VIEW IF EXISTS {name};" for name in reversed(VIEWS)) + "\n"
+
+
+def views_sql():
+    """DROP + CREATE statements for every view, runnable on Postgres and SQLite."""
+    creates = [f"CREATE VIEW {name} AS {sql.strip()};" for name, sql in VIEWS.items()]
+    return drop_views_sql() + "\n" + "\n\n".join(creates) + "\n"
+
+
+if __name__ == "__main__":
+    sys.stdout.write(views_sql())
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+
+from config import BIND_HOST
+from db.paging import fetch_all
+from db.pipeline import log
+from pools import DEFAULT_POOL, pool_dir
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+EXPORT_DIR = BASE_DIR / "data" / "exports"   # default pool; other pools in exports/pool-<id>/
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_PORT = 8601
+
+
+# --- Snapshot builders (one small set of queries per snapshot and pool) ---
+def build_standings(supabase, pool_id=DEFAULT_POOL):
+    """Classification table with team logos, ratings and form, as shown on the statistics page (same for every pool)."""
+    classification = supabase.table("classification").select(
+        "name, team_id, position, avg_points, total_points, games_played, home_points_ratio, "
+        "away_points_ratio, avg_goals_favor, avg_goals_against"
+    ).order("position").order("name").execute().data or []
+    logos = {t["id"]: t["logo"] for t in fetch_all(lambda: supabase.table("teams").select("id, logo").order("id"))}
+    ratings = {
+        r["team_id"]: r
+        for r in fetch_all(lambda: supabase.table("team_ratings").select("team_id, rating, form").order("team_id"))
+    }
+    return [
+        dict(row, logo=logos.get(row["team_id"]),
+             rating=ratings.get(row["team_id"], {}).get("rating"), form=ratings.get(row["team_id"], {}).get("form", ""))
+        for row in classification
+    ]
+
+
+def build_leaderboard(supabase, pool_id=DEFAULT_POOL):
+    """Users ranked by correct predictions over the season."""
+    return fetch_all(lambda: supabase.table("user_hits").select("username, hits").eq("pool_id", pool_id)
+                     .order("hits", desc=True).order("username"))
+
+
+def build_jornada_picks(supabase, pool_id=DEFAULT_POOL):
+    """Every pick made for the next jornada."""
+    today = datetime.today().strftime("%Y-%m-%d")
+    upcoming = (
+        supabase.table("matchdays").select("number, date")
+        .gt("date", today).order("date", desc=False).limit(1)
+        .execute().data or []
+    )
+    if not upcoming:
+        return []
+    jornada = upcoming[0]["number"]
+    return fetch_all(lambda: (
+        supabase.table("predictions")
+        .select("username, jornada, match_id, home_team, away_team, prediction, timestamp")
+        .eq("pool_id", pool_id)
+        .eq("jornada", jornada)
+        .order("username").order("home_team")
+    ))
+
+
+def build_jackpot_history(supabase, pool_id=DEFAULT_POOL):
+    """Accumulated jackpot per jornada with the winners that reset it."""
+    jackpot = fetch_all(lambda: supabase.table("jackpot").select("matchday, accumulated")
+                        .eq("pool_id", pool_id).order("matchday"))
+    winners = {}
+    for w in fetch_all(lambda: supabase.table("winners").select("username, matchday")
+                       .eq("pool_id", pool_id).order("matchday").order("username")):
+        winners.setdefault(w["matchday"], []).append(w["username"])
+    return [
+        {"matchday": row["matchday"], "accumulated": row["accumulated"],
+         "winners": ", ".join(sorted(winners.get(row["matchday"], [])))}
+        for row in jackpot
+    ]
+
+
+SNAPSHOTS = {
+    "standings": build_standings,
+    "leaderboard": build_leaderboard,
+    "jornada_picks": build_jornada_picks,
+    "jackpot_history": build_jackpot_history,
+}
+
+
+# --- Writing ---
+def write_atomic(path, text):
+    """
+    Write `text` to `path` through a temporary file in the same directory, so readers and
+    the snapshot server never see a half-written file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _load_manifest(directory):
+    if not (directory / MANIFEST_NAME).exists():
+        return {}
+    with open(directory / MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_snapshot(name, rows, manifest, directory=EXPORT_DIR):
+    """
+    Write `<name>.json` and `<name>.csv` if the content changed, each atomically.
+    The version is a hash of the rows, so unchanged data keeps its version (and ETag).
+    """
+    payload = json.dumps(rows, sort_keys=True, ensure_ascii=False, default=str)
+    version = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+    if manifest.get(name, {}).get("version") == version:
+        return False
+
+    generated_at = datetime.utcnow().isoformat()
+    write_atomic(directory / f"{name}.json", json.dumps(
+        {"name": name, "version": version, "generated_at": generated_at, "data": rows},
+        ensure_ascii=False, default=str,
+    ))
+    write_atomic(directory / f"{name}.csv", pd.DataFrame(rows).to_csv(index=False))
+
+    manifest[name] = {"version": version, "generated_at": generated_at, "rows": len(rows)}
+    return True
+
+
+def export_snapshots(supabase, names=None, pool_id=DEFAULT_POOL):
+    """
+    Rebuild a pool's snapshots (all by default) and write the ones that changed.
+    Raises RuntimeError after writing the rest if any snapshot failed.
+    """
+    directory = pool_dir(EXPORT_DIR, pool_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(directory)
+    written, failed = 0, []
+    for name in names or SNAPSHOTS:
+        try:
+            written += write_snapshot(name, SNAPSHOTS[name](supabase, pool_id), manifest, directory)
+        except Exception as e:
+            log(f"⚠️ Error exporting snapshot '{name}': {e}")
+            failed.append(name)
+
+    # Last, so the manifest never lists a version whose files aren't in place yet
+    write_atomic(directory / MANIFEST_NAME, json.dumps(manifest, indent=2))
+    log(f"✅ Exported {written} changed snapshots to {directory}")
+    if failed:
+        # The others are written; still report the export as failed
+        raise RuntimeError(f"snapshots {', '.join(failed)} not exported")
+
+
+# --- Read-only HTTP server ---
+class SnapshotHandler(SimpleHTTPRequestHandler):
+    """Serve files from a directory with strong ETags; never touches the database."""
+
+    def end_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def do_GET(self):
+        path = Path(self.translate_path(self.path))
+        if path.is_file():
+            etag = '"' + hashlib.sha1(path.read_bytes()).hexdigest() + '"'
+            if etag in (self.headers.get("If-None-Match") or ""):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._etag = etag
+        super().do_GET()
+
+    def send_header(self, keyword, value):
+        super().send_header(keyword, value)
+        # Attach the ETag next to the Last-Modified header of a regular file response
+        if keyword == "Last-Modified" and getattr(self, "_etag", None):
+            super().send_header("ETag", self._etag)
+            self._etag = None
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory=EXPORT_DIR, port=DEFAULT_PORT, handler=SnapshotHandler, host=BIND_HOST):
+    """Serve a directory of prebuilt files on `host` (localhost unless FCF_BIND_HOST says otherwise)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer((host, port), lambda *a, **kw: handler(*a, directory=str(directory), **kw))
+    print(f"🌐 Serving {directory} on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(port=int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT)
+    else:
+        from supabase import create_client
+        from db.update import get_secret
+        export_snapshots(create_client(get_secret("SUPABASE_URL"), get_secret("SUPABASE_KEY")))
@@ -0,0 +1,201 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# 1/X/2 encoded as small ints; -1 means "no pick" or "no result yet"
+OUTCOME_CODES = {"1": 0, "X": 1, "2": 2}
+NO_OUTCOME = -1
+
+RESULT_COLUMNS = ["matchday", "home_team", "away_team", "result"]
+
+# Up to 3^10 = 59,049 outcomes are enumerated exactly, above that we sample
+ENUMERATION_LIMIT = 10
+SAMPLES = 20_000
+
+# Bound the outcomes × users × matches comparison done at once
+MAX_CELLS = 20_000_000
+
+# Latest computations keyed by the known results and the picks of the jornada
+_cache = {}
+_CACHE_SIZE = 32
+
+
+def _encode_outcomes(values):
+    """Encode a Series of '1'/'X'/'2' (or None) as an int8 array."""
+    return values.map(OUTCOME_CODES).fillna(NO_OUTCOME).to_numpy(dtype=np.int8)
+
+
+def pick_matrix(predictions, results):
+    """
+    Rows of the 'predictions' and 'results' tables as compact integer arrays:
+    (users sorted by name, matches as a DataFrame of jornada/home_team/away_team sorted by
+    that key, picks as an int8 users × matches array, results as an int8 array per match),
+    with NO_OUTCOME where there is no pick or no result yet.
+    """
+    key = ["jornada", "home_team", "away_team"]
+    df_res = pd.DataFrame(results) if results else pd.DataFrame(columns=RESULT_COLUMNS)
+    df_res = df_res.rename(columns={"matchday": "jornada"})
+    df_res["jornada"] = pd.to_numeric(df_res["jornada"], errors="coerce").fillna(0).astype(int)
+
+    match_ids = {}
+    for k in df_res[key].itertuples(index=False, name=None):
+        match_ids.setdefault(k, len(match_ids))
+    user_ids = {}
+
+    if predictions:
+        df = pd.DataFrame(predictions)
+        df["jornada"] = pd.to_numeric(df["jornada"], errors="coerce").fillna(0).astype(int)
+
+        # Factorize, then map the few distinct values to ids
+        joined = df["jornada"].astype(str) + "\x1f" + df["home_team"].astype(str) + "\x1f" + df["away_team"].astype(str)
+        local, _ = pd.factorize(joined)
+        _, first = np.unique(local, return_index=True)
+        uniques = df[key].iloc[first].itertuples(index=False, name=None)
+        global_ids = np.array([match_ids.setdefault(k, len(match_ids)) for k in uniques], dtype=np.int64)
+        match_index = global_ids[local]
+
+        local, uniques = pd.factorize(df["username"])
+        global_ids = np.array([user_ids.setdefault(u, len(user_ids)) for u in uniques], dtype=np.int64)
+        user_index = global_ids[local]
+
+        pick_codes = _encode_outcomes(df["prediction"])
+
+    # Order matches by key and users by name so the layout doesn't depend on row order
+    match_keys = list(match_ids)
+    match_order = sorted(range(len(match_keys)), key=lambda i: match_keys[i])
+    match_rank = np.empty(len(match_keys), dtype=np.int64)
+    match_rank[match_order] = np.arange(len(match_keys))
+    matches = pd.DataFrame([match_keys[i] for i in match_order], columns=key)
+    if matches.empty:
+        matches = pd.DataFrame(columns=key).astype({"jornada": int})
+
+    users = sorted(user_ids)
+    user_rank = np.empty(len(users), dtype=np.int64)
+    user_rank[[user_ids[u] for u in users]] = np.arange(len(users))
+
+    known = np.full(len(match_keys), NO_OUTCOME, dtype=np.int8)
+    if len(df_res):
+        res_cols = match_rank[[match_ids[k] for k in df_res[key].itertuples(index=False, name=None)]]
+        known[res_cols] = _encode_outcomes(df_res["result"])
+
+    picks = np.full((len(users), len(match_keys)), NO_OUTCOME, dtype=np.int8)
+    if predictions:
+        picks[user_rank[user_index], match_rank[match_index]] = pick_codes
+
+    return users, matches, picks, known
+
+
+def _outcome_space(probabilities, rng):
+    """
+    Return (outcomes, weights) for the pending matches.
+    Small k: every 3^k combination with its exact probability. Large k: random samples.
+    """
+    k = len(probabilities)
+    if k <= ENUMERATION_LIMIT:
+        codes = np.arange(3 ** k)
+        outcomes = ((codes[:, None] // 3 ** np.arange(k)) % 3).astype(np.int8)
+        weights = np.prod(probabilities[np.arange(k), outcomes], axis=1)
+        return outcomes, weights
+
+    cumulative = np.cumsum(probabilities, axis=1)
+    draws = rng.random((SAMPLES, k, 1))
+    outcomes = (draws > cumulative[None, :, :]).sum(axis=2).astype(np.int8)
+    return outcomes, np.full(SAMPLES, 1 / SAMPLES)
+
+
+def _top_probabilities(current_hits, pending_picks, outcomes, weights):
+    """Probability of each user ending the jornada with the most hits (ties share the win)."""
+    n_users, k = pending_picks.shape
+    p_top = np.zeros(n_users)
+    chunk = max(1, MAX_CELLS // max(n_users * max(k, 1), 1))
+
+    for start in range(0, len(outcomes), chunk):
+        block = outcomes[start:start + chunk]
+        hits = current_hits[None, :] + (pending_picks[None, :, :] == block[:, None, :]).sum(axis=2)
+        is_top = hits == hits.max(axis=1, keepdims=True)
+        p_top += weights[start:start + chunk] @ (is_top / is_top.sum(axis=1, keepdims=True))
+
+    return p_top
+
+
+def jornada_contenders(predictions, results, jornada, probabilities=None, seed=0):
+    """
+    Work out, for every user with picks in a jornada that is still being played:
+      - full_house_possible: every decided match was hit and every pending one was picked
+      - current_hits / max_hits: hits so far and the most they can still reach
+      - p_jackpot: probability of hitting all matches (needed to win the jackpot)
+      - jackpot_share: expected fraction of the jackpot, splitting with identical full houses
+      - p_top: probability of ending the jornada with the most hits
+
+    `probabilities` optionally maps (home_team, away_team) to [p(1), p(X), p(2)];
+    matches without an entry count as 1/3 each.
+    """
+    users, matches, all_picks, all_known = pick_matrix(predictions, results)
+    cols = np.flatnonzero(matches["jornada"].to_numpy() == int(jornada))
+    if len(users) == 0 or len(cols) == 0:
+        return []
+
+    picks = all_picks[:, cols]
+    known = all_known[cols]
+    decided = known != NO_OUTCOME
+    pending = ~decided
+
+    key = (
+        int(jornada),
+        known.tobytes(),
+        hashlib.sha1(picks.tobytes() + "|".join(users).encode("utf-8")).hexdigest(),
+        None if probabilities is None else tuple(sorted((m, tuple(p)) for m, p in probabilities.items())),
+    )
+    if key in _cache:
+        return _cache[key]
+
+    current_hits = (picks[:, decided] == known[None, decided]).sum(axis=1)
+    pending_picks = picks[:, pending]
+    k = pending_picks.shape[1]
+
+    max_hits = current_hits + (pending_picks != NO_OUTCOME).sum(axis=1)
+    alive = (current_hits == decided.sum()) & (max_hits == len(cols))
+
+    pending_matches = matches.iloc[cols[pending]]
+    probabilities = np.array([
+        (probabilities or {}).get((m.home_team, m.away_team), [1 / 3, 1 / 3, 1 / 3])
+        for m in pending_matches.itertuples()
+    ], dtype=float).reshape(k, 3)
+
+    # A full house happens exactly when the pending results equal the user's picks,
+    # and it is shared with every other alive user holding the same picks.
+    safe_picks = np.where(pending_picks == NO_OUTCOME, 0, pending_picks)
+    p_exact = np.prod(probabilities[np.arange(k), safe_picks], axis=1) if k else np.ones(len(picks))
+    p_jackpot = np.where(alive, p_exact, 0.0)
+
+    # Only alive users can share: group their pending picks (with no pending match, every
+    # alive user holds the same full house)
+    jackpot_share = np.zeros(len(picks))
+    if alive.any():
+        _, group, group_size = np.unique(
+            pending_picks[alive].reshape(int(alive.sum()), k), axis=0, return_inverse=True, return_counts=True
+        )
+        jackpot_share[alive] = p_jackpot[alive] / group_size[group.ravel()]
+
+    outcomes, weights = _outcome_space(probabilities, np.random.default_rng(seed))
+    p_top = _top_probabilities(current_hits, pending_picks, outcomes, weights)
+
+    contenders = [
+        {
+            "username": users[u],
+            "full_house_possible": bool(alive[u]),
+            "current_hits": int(current_hits[u]),
+            "max_hits": int(max_hits[u]),
+            "p_jackpot": round(float(p_jackpot[u]), 4),
+            "jackpot_share": round(float(jackpot_share[u]), 4),
+            "p_top": round(float(p_top[u]), 4),
+        }
+        for u in range(len(users))
+    ]
+    contenders.sort(key=lambda x: (-x["p_jackpot"], -x["p_top"], -x["max_hits"], x["username"]))
+
+    if len(_cache) >= _CACHE_SIZE:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = contenders
+    return contenders
@@ -7,6 +7,16 @@ import streamlit as st
 from supabase import create_client, Client
 from config import BASE_DIR, DATA_DIR, DATA_FILE
 from main import update_whole_data
+from simulation import load_simulation
+from match_odds import match_probabilities
+from live_jornada import jornada_contenders
+from export import export_snapshots
+from db.offline import offline_enabled, get_offline_client
+from db.outbox import enqueue_save, pending_saves, start_flusher
+from db.paging import stream_rows, fetch_all
+from db.migrations import LATEST_VERSION
+from pools import DEFAULT_POOL, DEFAULT_POOL_NAME
+from metrics import timed_query
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -25,11 +35,24 @@ def get_secret(key: str):
 SUPABASE_URL = get_secret("SUPABASE_URL")
 SUPABASE_KEY = get_secret("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+if offline_enabled():
+    # Local SQLite stand-in, see db/offline.py
+    supabase = get_offline_client()
+elif not SUPABASE_URL or not SUPABASE_KEY:
     st.error("❌ Missing Supabase credentials. Please set SUPABASE_URL and SUPABASE_KEY.")
+    supabase = None
 else:
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+def start_outbox_flusher():
+    """
+    Start the background outbox flusher (once per process). The app calls it on load, so
+    saves left by a previous run go out without waiting for a new save; the read-only picks
+    snapshots follow every flush. Tools and scripts importing logic don't get one.
+    """
+    if supabase is not None:
+        start_flusher(supabase, on_flush=lambda pools: [export_snapshots(supabase, ["jornada_picks"], pool) for pool in pools])
+
 
 # --- Load local data ---
 def load_data():
@@ -43,35 +66,33 @@ def load_data():
 
 # --- Database logic using Supabase ---
 def init_db():
-    """Ensure the 'predictions' table exists (no-op if already created)."""
+    """Ensure the database schema is migrated to the version this code expects."""
     try:
-        supabase.table("predictions").select("*").limit(1).execute()
+        data = supabase.table("schema_migrations").select("version").order("version", desc=True).limit(1).execute().data
     except Exception:
-        st.error("⚠️ Ensure the 'predictions' table exists in Supabase.")
+        st.error("⚠️ Database schema missing. Run `python src/db/migrations.py --dsn <postgres url>` first.")
         st.stop()
+    if not data or data[0]["version"] < LATEST_VERSION:
+        st.warning("⚠️ Database schema is out of date. Run `python src/db/migrations.py --dsn <postgres url>`.")
 
 
-def save_predictions_db(username, matchday_number, predictions):
-    """Save user predictions into Supabase, replacing old ones if they exist."""
-    print("Saving predictions")
-    print(username)
-    print(matchday_number)
-    print(predictions)
+@timed_query
+def save_predictions_db(username, matchday_number, predictions, pool_id=DEFAULT_POOL):
+    """
+    Save user predictions, replacing old ones if they exist.
+    The save is written to the local outbox and acknowledged immediately; a background
+    flusher appends it to the prediction event log and compacts it into `predictions`,
+    so a slow or unreachable database never loses picks and earlier saves stay auditable.
+    """
     timestamp = datetime.utcnow().isoformat()
- 
-
-    # 1️⃣ Delete old predictions for this user + jornada
-    supabase.table("predictions").delete().match({
-        "username": username,
-        "jornada": matchday_number
-    }).execute()
 
-    # 2️⃣ Insert new ones
     new_records = [
         {
+            "pool_id": pool_id,
             "username": username,
             "jornada": matchday_number,
             "timestamp": timestamp,
+            "match_id": info.get("match_id"),
             "home_team": info["home_team"],
             "away_team": info["away_team"],
             "prediction": info["prediction"]
@@ -79,101 +100,105 @@ def save_predictions_db(username, matchday_number, predictions):
         for info in predictions.values()
         if info["prediction"]
     ]
-    print(new_records)
 
-    if new_records:
-        supabase.table("predictions").insert(new_records).execute()
+    enqueue_save(username, matchday_number, new_records, pool_id)
 
 
-def get_all_predictions():
-    """Return all predictions as a pandas DataFrame."""
-    res = supabase.table("predictions").select("*").order("timestamp", desc=True).execute()
-    if not res.data:
-        return pd.DataFrame(columns=["username", "jornada", "timestamp", "match", "prediction"])
-    return pd.DataFrame(res.data)
+def get_pending_saves():
+    """Number of saved predictions that haven't reached Supabase yet."""
+    try:
+        return pending_saves()
+    except Exception as e:
+        print(f"⚠️ Error in get_pending_saves: {e}")
+        return 0
 
 
-def get_prediction_distribution(home_team, away_team):
-    """Return % distribution of '1', 'X', '2' for a given match, directly from Supabase."""
-    try:
-        # ✅ Fetch only relevant rows
-        res = (
-            supabase.table("predictions")
-            .select("prediction")
-            .eq("home_team", home_team)
-            .eq("away_team", away_team)
-            .execute()
-        )
+@timed_query
+def get_all_predictions(pool_id=DEFAULT_POOL):
+    """Return all predictions of a pool as a pandas DataFrame."""
+    data = fetch_all(lambda: supabase.table("predictions").select("*").eq("pool_id", pool_id)
+                     .order("timestamp", desc=True).order("username").order("home_team"))
+    if not data:
+        return pd.DataFrame(columns=["username", "jornada", "timestamp", "match", "prediction"])
+    return pd.DataFrame(data)
 
-        data = res.data or []
-        if not data:
-            return pd.Series({"1": 0, "X": 0, "2": 0})
 
-        # ✅ Build DataFrame for aggregation
-        df = pd.DataFrame(data)
-        dist = df["prediction"].value_counts(normalize=True)
-        return dist.reindex(["1", "X", "2"], fill_value=0)
+@timed_query
+def get_prediction_distribution(match_ids, pool_id=DEFAULT_POOL):
+    """Return {match_id: % distribution of '1', 'X', '2'} for a jornada's matches, in one query."""
+    empty = pd.Series({"1": 0, "X": 0, "2": 0})
+    try:
+        # ✅ Counted by the database: at most three rows per match come back
+        rows = fetch_all(lambda: (
+            supabase.table("prediction_distribution")
+            .select("match_id, prediction, picks")
+            .eq("pool_id", pool_id)
+            .in_("match_id", list(match_ids))
+            .order("match_id").order("prediction")
+        ))
+        counts = {match_id: {"1": 0, "X": 0, "2": 0} for match_id in match_ids}
+        for row in rows:
+            counts[row["match_id"]][row["prediction"]] = row["picks"]
+
+        distribution = {}
+        for match_id, match_counts in counts.items():
+            total = sum(match_counts.values())
+            distribution[match_id] = pd.Series({opt: n / total for opt, n in match_counts.items()}) if total else empty
+        return distribution
 
     except Exception as e:
         print(f"⚠️ Error in get_prediction_distribution: {e}")
-        return pd.Series({"1": 0, "X": 0, "2": 0})
+        return {match_id: empty for match_id in match_ids}
 
 
 
-def get_match_predictions(home_team, away_team):
-    """Return a dict showing which users picked each prediction (1, X, 2) directly from Supabase."""
+@timed_query
+def get_match_predictions(matchday_number, pool_id=DEFAULT_POOL):
+    """Return {match_id: users that picked each prediction (1, X, 2)} for a whole jornada."""
     try:
-        # ✅ Fetch only the relevant columns for this match
-        res = (
+        # ✅ One read for the jornada; (pool_id, jornada) is an index lookup
+        rows = stream_rows(lambda: (
             supabase.table("predictions")
-            .select("username, prediction")
-            .eq("home_team", home_team)
-            .eq("away_team", away_team)
-            .execute()
-        )
-
-        data = res.data or []
-        if not data:
-            return {"1": [], "X": [], "2": []}
-
-        # ✅ Build DataFrame for grouping
-        df = pd.DataFrame(data)
-
-        # ✅ Group usernames by prediction
-        grouped = df.groupby("prediction")["username"].apply(list).to_dict()
+            .select("match_id, username, prediction")
+            .eq("pool_id", pool_id)
+            .eq("jornada", matchday_number)
+            .order("match_id")
+            .order("username")
+        ))
+        grouped = {}
+        for row in rows:
+            options = grouped.setdefault(row["match_id"], {"1": [], "X": [], "2": []})
+            if row["prediction"] in options:
+                options[row["prediction"]].append(row["username"])
 
-        # ✅ Ensure all possible options are included
-        return {opt: grouped.get(opt, []) for opt in ["1", "X", "2"]}
+        return grouped
 
     except Exception as e:
         print(f"⚠️ Error in get_match_predictions: {e}")
-        return {"1": [], "X": [], "2": []}
+        return {}
 
 
 
-def get_number_of_users(matchday_number):
+@timed_query
+def get_number_of_users(matchday_number, pool_id=DEFAULT_POOL):
     """Return number of unique users who made predictions for a given jornada."""
-    print(matchday_number)
     try:
-        res = (
-            supabase.table("predictions")
-            .select("username")
+        data = (
+            supabase.table("jornada_users")
+            .select("users")
+            .eq("pool_id", pool_id)
             .eq("jornada", matchday_number)
             .execute()
+            .data or []
         )
-
-        data = res.data or []
-        if not data:
-            return 0
-
-        df = pd.DataFrame(data)
-        return df["username"].nunique()
+        return data[0]["users"] if data else 0
 
     except Exception as e:
         print(f"⚠️ Error in get_number_of_users: {e}")
         return 0
 
 
+@timed_query
 def get_next_matchday():
     """Find the next jornada (matchday) after today, using Supabase filter."""
     today = datetime.today().strftime("%Y-%m-%d")
@@ -200,24 +225,26 @@ def get_next_matchday():
         print(f"⚠️ Error in get_next_jornada: {e}")
         return None
 
+@timed_query
 def get_matches(matchday: str):
     """
     Return all matches for a given matchday where result is NULL.
     Includes home_team, away_team, and their logos via join with 'teams' table.
     """
     try:
-        home_teams = {t["name"]: t["logo"] for t in supabase.table("teams").select("name,logo").execute().data}
-        away_teams = home_teams  # same table
+        # Logos keyed by the integer team id, so odd whitespace in names can't break the join
+        logos = {t["id"]: t["logo"] for t in fetch_all(lambda: supabase.table("teams").select("id,logo").order("id"))}
 
-        matches = supabase.table("results").select("*").eq("matchday", matchday).execute().data
+        matches = supabase.table("results").select("*").eq("matchday", matchday).order("match_id").execute().data
 
         formatted = []
         for m in matches:
             formatted.append({
+                "match_id": m["match_id"],
                 "home_team": m["home_team"],
-                "home_logo": home_teams.get(m["home_team"]),
+                "home_logo": logos.get(m["home_team_id"]),
                 "away_team": m["away_team"],
-                "away_logo": away_teams.get(m["away_team"]),
+                "away_logo": logos.get(m["away_team_id"]),
                 "result": m["result"],
             })
 
@@ -229,18 +256,33 @@ def get_matches(matchday: str):
         return []
 
 
-def get_existing_users():
-    """Return a static sorted list of users."""
-    users = sorted([
-        "Adri", "Aaron", "Alvaro", "Jorge", "Quinco", "Callau",
-        "Torrema", "Rovira", "Gorka", "Joan", "Guille", "Sergio",
-        "Gimeno", "Chete", "Javi", "Luca"
-    ])
-    return users
+@timed_query
+def get_existing_users(pool_id=DEFAULT_POOL):
+    """Return the sorted members of a pool."""
+    try:
+        return [
+            m["username"]
+            for m in fetch_all(lambda: supabase.table("pool_members").select("username")
+                               .eq("pool_id", pool_id).order("username"))
+        ]
+    except Exception as e:
+        print(f"⚠️ Error in get_existing_users({pool_id}): {e}")
+        return []
+
+
+@timed_query
+def get_pools():
+    """Return every pool as [{"id": ..., "name": ...}]."""
+    try:
+        return fetch_all(lambda: supabase.table("pools").select("id, name").order("id"))
+    except Exception as e:
+        print(f"⚠️ Error in get_pools: {e}")
+        return [{"id": DEFAULT_POOL, "name": DEFAULT_POOL_NAME}]
 
 
 
 # --- Corrected get_classification function ---
+@timed_query
 def get_classification():
     """
     Return the current classification table with team photos.
@@ -250,23 +292,32 @@ def get_classification():
     try:
         # Fetch classification data
         # 'team_id' removed from select, as it does not exist.
-        classification_data = supabase.table("classification").select(
-            "name, position, avg_points, total_points, games_played, home_points_ratio, away_points_ratio, avg_goals_favor, avg_goals_against"
-        ).order("position").execute().data
+        classification_data = fetch_all(lambda: supabase.table("classification").select(
+            "name, team_id, position, avg_points, total_points, games_played, home_points_ratio, away_points_ratio, avg_goals_favor, avg_goals_against"
+        ).order("position").order("name"))
 
         # Fetch team data to get photo URLs
-        teams_data = supabase.table("teams").select("name, logo").execute().data # Selecting 'name' for join key
+        teams_data = fetch_all(lambda: supabase.table("teams").select("id, logo").order("id")) # Selecting 'id' for join key
+
+        # Convert teams data to a dictionary for efficient lookup, using the integer team id as the key
+        team_photo_map = {team["id"]: team["logo"] for team in teams_data}
 
-        # Convert teams data to a dictionary for efficient lookup, using 'name' as the key
-        team_photo_map = {team["name"]: team["logo"] for team in teams_data} # Using 'name' as key, directly storing logo
+        # Elo rating and last five results per team, kept up to date by update_ratings
+        ratings_map = {
+            r["team_id"]: r
+            for r in fetch_all(lambda: supabase.table("team_ratings").select("team_id, rating, form").order("team_id"))
+        }
 
         processed_classification = []
         for item in classification_data:
-            team_name = item.get("name") # Get the team's name from classification
-            if team_name and team_name in team_photo_map:
-                item['logo'] = team_photo_map[team_name] # Get logo using team_name
+            team_id = item.get("team_id") # Get the team's id from classification
+            if team_id is not None and team_id in team_photo_map:
+                item['logo'] = team_photo_map[team_id] # Get logo using team_id
             else:
                 item['logo'] = None # No photo if team name not found in teams data
+            rating = ratings_map.get(team_id, {})
+            item['rating'] = rating.get('rating')
+            item['form'] = rating.get('form', '')
             processed_classification.append(item)
             
         return processed_classification
@@ -275,52 +326,71 @@ def get_classification():
         return []
     
 
-def get_top_users():
+@timed_query
+def get_last_refresh():
+    """Moment of the last database refresh (ISO string), or None if there has been none."""
+    try:
+        res = supabase.table("last_refresh").select("moment").order("moment", desc=True).limit(1).execute()
+        return res.data[0]["moment"] if res.data else None
+    except Exception as e:
+        print(f"⚠️ Error in get_last_refresh: {e}")
+        return None
+
+
+@timed_query
+def get_match_probabilities(matches):
+    """
+    Poisson 1/X/2 probabilities for `matches` (as returned by get_matches), from the
+    classification averages: {match_id: {"1": p, "X": p, "2": p}}. One query for the
+    whole jornada. Cache it per get_last_refresh(): the classification only changes on a refresh.
+    """
+    try:
+        classification = fetch_all(lambda: supabase.table("classification").select(
+            "name, games_played, home_points_ratio, away_points_ratio, avg_goals_favor, avg_goals_against"
+        ).order("name"))
+        probabilities = match_probabilities(classification, [(m["home_team"], m["away_team"]) for m in matches])
+        return {m["match_id"]: probabilities[(m["home_team"], m["away_team"])] for m in matches}
+    except Exception as e:
+        print(f"⚠️ Error in get_match_probabilities: {e}")
+        return {}
+
+
+@timed_query
+def get_top_users(pool_id=DEFAULT_POOL):
     """
     Get users with the most correct predictions.
     Returns a list of dicts: [{"username": ..., "hits": ...}]
     """
     try:
-        # Fetch all predictions (using 'jornada')
-        predictions = supabase.table("predictions").select(
-            "username, jornada, home_team, away_team, prediction"
-        ).execute().data
+        # Hits are summed by the 'user_hits' view, one row per user comes back
+        return fetch_all(lambda: supabase.table("user_hits").select(
+            "username, hits"
+        ).eq("pool_id", pool_id).order("hits", desc=True).order("username"))
 
-        # Fetch all results (using 'matchday')
-        results = supabase.table("results").select(
-            "matchday, home_team, away_team, result"
-        ).execute().data
+    except Exception as e:
+        print(f"⚠️ Error in get_top_users: {e}")
+        return []
 
-        # Map results by their unique identifiers
-        result_map = {
-            (r["matchday"], r["home_team"], r["away_team"]): r["result"]
-            for r in results if r.get("result")
-        }
 
-        # Count correct predictions
-        hits = {}
-        for p in predictions:
-            # Normalize jornada → matchday for comparison
-            key = (p["jornada"], p["home_team"], p["away_team"])
-            # Compare against results table using jornada/matchday equivalence
-            if key in result_map and p["prediction"] == result_map[key]:
-                hits[p["username"]] = hits.get(p["username"], 0) + 1
-
-        # Sort users by number of hits
-        top_users = sorted(
-            [{"username": u, "hits": c} for u, c in hits.items()],
-            key=lambda x: x["hits"],
-            reverse=True
-        )
 
-        return top_users
+@timed_query
+def get_user_timeline(pool_id=DEFAULT_POOL):
+    """
+    Hits, cumulative hits and rank of every user after each decided jornada, kept up to
+    date by db/timeline.py. Returns [{"username", "jornada", "hits", "cumulative_hits", "rank"}].
+    """
+    try:
+        return fetch_all(lambda: supabase.table("user_timeline").select(
+            "username, jornada, hits, cumulative_hits, rank"
+        ).eq("pool_id", pool_id).order("jornada").order("username"))
 
     except Exception as e:
-        print(f"⚠️ Error in get_top_users: {e}")
+        print(f"⚠️ Error in get_user_timeline: {e}")
         return []
 
 
 
+@timed_query
 def get_last_matchday():
     """Find the next jornada (matchday) after today, using Supabase filter."""
     today = datetime.today().strftime("%Y-%m-%d")
@@ -348,7 +418,8 @@ def get_last_matchday():
         return None
 
 # --- Corrected get_users_hits_last_matchday function ---
-def get_users_hits_last_matchday():
+@timed_query
+def get_users_hits_last_matchday(pool_id=DEFAULT_POOL):
     """
     Return users and their hit ratio for the latest matchday.
     """
@@ -356,38 +427,14 @@ def get_users_hits_last_matchday():
     try:
         last_matchday = get_last_matchday()["number"]
 
-        # --- Get predictions for the last matchday ---
-        # IMPORTANT: Replace "matchday" with the actual column name in your predictions table
-        # Based on error, it's NOT 'matchday'. Let's assume 'jornada_number' as an example.
-        predictions = supabase.table("predictions").select(
-            "username, jornada, home_team, away_team, prediction" # <-- FIX: Replaced 'matchday'
-        ).eq("jornada", last_matchday).execute().data # <-- FIX: Replaced 'matchday'
+        # --- Ratios computed by the 'jornada_hit_ratios' view, one row per user ---
+        rows = fetch_all(lambda: supabase.table("jornada_hit_ratios").select(
+            "username, hit_ratio"
+        ).eq("pool_id", pool_id).eq("jornada", last_matchday).order("username"))
 
-        # --- Get results for the last matchday ---
-        # IMPORTANT: Replace "matchday" with the actual column name in your results table
-        # Based on error, it's NOT 'matchday'. Let's assume 'jornada_number' as an example.
-        results = supabase.table("results").select(
-            "matchday, home_team, away_team, result" # <-- FIX: Replaced 'matchday'
-        ).eq("matchday", last_matchday).execute().data # <-- FIX: Replaced 'matchday'
-
-        result_map = {
-            (r["home_team"], r["away_team"]): r["result"] 
-            for r in results if r["result"]
-        }
-
-        ratio = {}
-        total_preds = {}
-        for p in predictions:
-            user = p["username"]
-            key = (p["home_team"], p["away_team"])
-            total_preds[user] = total_preds.get(user, 0) + 1
-            if key in result_map and p["prediction"] == result_map[key]:
-                ratio[user] = ratio.get(user, 0) + 1
-
-        # Compute hit ratios
         hit_ratios = [
-            {"username": u, "hit_ratio": round(ratio.get(u, 0)/total_preds[u], 2)}
-            for u in total_preds
+            {"username": r["username"], "hit_ratio": round(float(r["hit_ratio"]), 2)}
+            for r in rows
         ]
         return sorted(hit_ratios, key=lambda x: x["hit_ratio"], reverse=True)
 
@@ -395,6 +442,27 @@ def get_users_hits_last_matchday():
         print(f"⚠️ Error in get_users_hit_ratio_last_matchday: {e}")
         return []
 
+@timed_query
+def get_jornada_contenders(matchday_number, pool_id=DEFAULT_POOL):
+    """
+    Return, for a jornada still being played, who can still hit every match,
+    how many hits each user can reach and their odds of taking the jackpot.
+    """
+    try:
+        predictions = fetch_all(lambda: supabase.table("predictions").select(
+            "username, jornada, home_team, away_team, prediction"
+        ).eq("pool_id", pool_id).eq("jornada", matchday_number).order("username").order("home_team"))
+
+        results = supabase.table("results").select(
+            "matchday, home_team, away_team, result"
+        ).eq("matchday", matchday_number).execute().data
+
+        return jornada_contenders(predictions, results, matchday_number)
+
+    except Exception as e:
+        print(f"⚠️ Error in get_jornada_contenders({matchday_number}): {e}")
+        return []
+
 def update_results():
     """
     Updates results data only if:
@@ -428,7 +496,8 @@ def update_results():
     except Exception as e:
         return {"error": f"❌ Failed to update data: {e}"}
     
-def get_jackpot_for_matchday(matchday):
+@timed_query
+def get_jackpot_for_matchday(matchday, pool_id=DEFAULT_POOL):
     """
     Returns the jackpot value for a given matchday.
     If not found, returns 0.
@@ -437,6 +506,7 @@ def get_jackpot_for_matchday(matchday):
         data = (
             supabase.table("jackpot")
             .select("accumulated")
+            .eq("pool_id", pool_id)
             .eq("matchday", matchday)
             .execute()
             .data
@@ -452,17 +522,20 @@ def get_jackpot_for_matchday(matchday):
         return 0
 
 
-def get_historic_winners(matchday=None):
+@timed_query
+def get_historic_winners(matchday=None, pool_id=DEFAULT_POOL):
     """
     Returns all winners from the 'winners' table.
     If matchday is provided, filters to that jornada only.
     """
     try:
-        query = supabase.table("winners").select("username, matchday")
-        if matchday is not None:
-            query = query.eq("matchday", matchday)
+        def query():
+            q = supabase.table("winners").select("username, matchday").eq("pool_id", pool_id)
+            if matchday is not None:
+                q = q.eq("matchday", matchday)
+            return q.order("matchday", desc=False).order("username")
 
-        data = query.order("matchday", desc=False).execute().data or []
+        data = fetch_all(query)
 
         # Sort nicely by matchday ascending, then username
         data.sort(key=lambda x: (x["matchday"], x["username"]))
@@ -472,3 +545,19 @@ def get_historic_winners(matchday=None):
     except Exception as e:
         print(f"⚠️ Error in get_historic_winners({matchday}): {e}")
         return []
+
+
+
+def get_final_position_odds(n_sims=100_000):
+    """
+    Return the probability of each team finishing in each position, as simulated by
+    update_data for the local calendar. Never simulates: [] until the refresh has run.
+    """
+    try:
+        data = load_data()
+        if not data:
+            return []
+        return load_simulation(data, n_sims=n_sims) or []
+    except Exception as e:
+        print(f"⚠️ Error in get_final_position_odds: {e}")
+        return []
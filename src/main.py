@@ -1,16 +1,26 @@
+import sys
 from scrap.scraper import scrap_results
 from db.update import update_data
+from profiling import profiled
+from metrics import timed, write_textfile
 
 def update_whole_data():
     # 1️⃣ Scrape latest match results
     print("🔹 Scraping latest results...")
-    scrap_results()
+    with profiled("update-scrape"), timed("fcf_update_phase_seconds", phase="scrape"):
+        scrap_results()
     print(f"✅ Scraped matches.")
 
     # 2️⃣ Update the database with new results
     print("🔹 Updating database...")
-    update_data()
+    with profiled("update-database"), timed("fcf_update_phase_seconds", phase="update_data"):
+        update_data()
     print("✅ Database updated successfully.")
+    write_textfile()
 
 if __name__ == "__main__":
-    update_whole_data()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from scrap.scheduler import run_scheduler
+        run_scheduler()
+    else:
+        update_whole_data()
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+# --- 1X2 probabilities for upcoming matches ---
+# Independent Poisson goals per side. A team's attack is its goals scored per game over
+# the league average, its defence the goals it concedes per game over the same average;
+# the home side's rate is scaled up by the league's home advantage, read from the home/away
+# points ratios of the classification. Every fixture of a jornada is scored in one
+# vectorized pass over a goals × goals grid; the app caches the result per refresh.
+
+MAX_GOALS = 25          # futsal scores run high; the grid keeps > 99.99% of the mass
+MIN_RATE = 0.25         # floor for expected goals, as in simulation.py
+HOME_BOOST_RANGE = (1.0, 1.5)
+
+def _poisson_pmf(rates):
+    """P(goals = k) for k in 0..MAX_GOALS, one row per rate."""
+    k = np.arange(MAX_GOALS + 1)
+    log_factorial = np.array([math.lgamma(n + 1) for n in k])
+    rates = np.asarray(rates, dtype=float)[:, None]
+    return np.exp(k * np.log(rates) - rates - log_factorial)
+
+
+def expected_goals(classification, fixtures):
+    """(home rates, away rates) arrays for `fixtures` as (home name, away name) pairs."""
+    stats = {row["name"]: row for row in classification}
+    played = [row for row in classification if row.get("games_played")]
+    league_avg = np.mean([row["avg_goals_favor"] for row in played]) if played else 1.0
+    league_avg = max(league_avg, MIN_RATE)
+
+    home_ratio = np.mean([row["home_points_ratio"] for row in played]) if played else 0
+    away_ratio = np.mean([row["away_points_ratio"] for row in played]) if played else 0
+    boost = math.sqrt(home_ratio / away_ratio) if home_ratio and away_ratio else 1.0
+    boost = min(max(boost, HOME_BOOST_RANGE[0]), HOME_BOOST_RANGE[1])
+
+    def strength(name, key):
+        row = stats.get(name)
+        if not row or not row.get("games_played"):
+            return 1.0  # unknown or unplayed team: league average
+        return max(row[key], MIN_RATE) / league_avg
+
+    attack_home = np.array([strength(h, "avg_goals_favor") for h, _ in fixtures])
+    defence_home = np.array([strength(h, "avg_goals_against") for h, _ in fixtures])
+    attack_away = np.array([strength(a, "avg_goals_favor") for _, a in fixtures])
+    defence_away = np.array([strength(a, "avg_goals_against") for _, a in fixtures])
+
+    lam_home = np.maximum(league_avg * attack_home * defence_away * boost, MIN_RATE)
+    lam_away = np.maximum(league_avg * attack_away * defence_home / boost, MIN_RATE)
+    return lam_home, lam_away
+
+
+def outcome_probabilities(lam_home, lam_away):
+    """matches × 3 array of P(1), P(X), P(2)."""
+    home = _poisson_pmf(lam_home)
+    away = _poisson_pmf(lam_away)
+    grid = home[:, :, None] * away[:, None, :]   # matches × home goals × away goals
+    p_home = np.tril(grid, k=-1).sum(axis=(1, 2))
+    p_draw = np.trace(grid, axis1=1, axis2=2)
+    p_away = np.triu(grid, k=1).sum(axis=(1, 2))
+    probabilities = np.stack([p_home, p_draw, p_away], axis=1)
+    return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+def match_probabilities(classification, fixtures):
+    """{(home, away): {"1": p, "X": p, "2": p}} for `fixtures` as (home name, away name) pairs."""
+    fixtures = tuple(fixtures)
+    if not fixtures:
+        return {}
+    probabilities = outcome_probabilities(*expected_goals(classification, fixtures))
+    return {
+        fixture: {outcome: round(float(p), 4) for outcome, p in zip(("1", "X", "2"), row)}
+        for fixture, row in zip(fixtures, probabilities)
+    }
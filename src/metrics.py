@@ -0,0 +1,212 @@
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import BASE_DIR, BIND_HOST
+
+# --- Operational metrics ---
+# In-process counters and histograms for the scraper, the update pipeline and the app's
+# backend queries, rendered in the Prometheus text format. One-shot runs (main.py) write
+# them to a textfile for node_exporter's textfile collector; long-running processes (the
+# scheduler, the app with FCF_METRICS_PORT set) also serve them on /metrics.
+#
+#   python src/metrics.py                 # print the last textfile
+#   python src/metrics.py serve [port]    # serve it on :8603/metrics
+
+METRICS_FILE = BASE_DIR / "data" / "metrics" / "fcf.prom"
+DEFAULT_PORT = 8603
+
+# Seconds; covers a cached lookup (ms) up to a full scrape + refresh (minutes)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name -> (type, help); every recorded metric must be declared here
+METRICS = {
+    "fcf_scrape_seconds": ("histogram", "Time to download the FCF calendar page."),
+    "fcf_scrape_bytes_total": ("counter", "Bytes downloaded from FCF."),
+    "fcf_scrape_not_modified_total": ("counter", "Conditional scrapes answered with 304."),
+    "fcf_parse_seconds": ("histogram", "Time to parse the calendar HTML."),
+    "fcf_rows_written_total": ("counter", "Rows written to the database, by table."),
+    "fcf_update_phase_seconds": ("histogram", "Duration of each update_data phase."),
+    "fcf_query_seconds": ("histogram", "Backend query latency, by logic function."),
+    "fcf_query_errors_total": ("counter", "Logic functions that raised, by function."),
+    "fcf_cache_requests_total": ("counter", "Cache lookups, by cache."),
+    "fcf_cache_misses_total": ("counter", "Cache lookups that had to compute the value, by cache."),
+}
+
+_lock = threading.Lock()
+_counters = {}     # (name, labels) -> value
+_histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+
+
+def _key(name, labels):
+    if name not in METRICS:
+        raise KeyError(f"Undeclared metric {name}")
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add `value` to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Record one histogram observation."""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.setdefault(key, [0] * (len(BUCKETS) + 2))
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe the duration of a `with` block, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed_query(fn):
+    """Decorator for logic functions: latency in fcf_query_seconds, failures in fcf_query_errors_total."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            inc("fcf_query_errors_total", function=fn.__name__)
+            raise
+        finally:
+            observe("fcf_query_seconds", time.perf_counter() - start, function=fn.__name__)
+    return wrapper
+
+
+def counted_cache(name, cache):
+    """
+    Wrap a memoizing decorator (e.g. st.cache_data(ttl=60)) so lookups and misses are
+    counted: the function body only runs on a miss.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            inc("fcf_cache_misses_total", cache=name)
+            return fn(*args, **kwargs)
+
+        cached = cache(compute)
+
+        @functools.wraps(fn)
+        def lookup(*args, **kwargs):
+            inc("fcf_cache_requests_total", cache=name)
+            return cached(*args, **kwargs)
+        lookup.clear = getattr(cached, "clear", None)
+        return lookup
+    return decorator
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """Every recorded metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(hist) for key, hist in _histograms.items()}
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = counters if kind == "counter" else histograms
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in keys:
+            labels = key[1]
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {series[key]}")
+                continue
+            hist = series[key]
+            for bound, count in zip(BUCKETS, hist):
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {hist[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=METRICS_FILE):
+    """Atomically write the current metrics for the node_exporter textfile collector."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(render(), encoding="utf-8")
+        tmp.replace(path)
+    except Exception as e:
+        print(f"⚠️ Error in write_textfile: {e}")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics; `source` returns the text to serve."""
+
+    source = staticmethod(render)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.source().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_server(port=None):
+    """Serve this process's metrics on /metrics from a daemon thread, once per process."""
+    global _server
+    port = port or int(os.getenv("FCF_METRICS_PORT") or 0)
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((BIND_HOST, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Error in start_server: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"🌐 Serving metrics on http://{BIND_HOST}:{port}/metrics")
+    return _server
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        class TextfileHandler(MetricsHandler):
+            source = staticmethod(lambda: METRICS_FILE.read_text(encoding="utf-8") if METRICS_FILE.exists() else "")
+
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+        print(f"🌐 Serving {METRICS_FILE} on http://{BIND_HOST}:{port}/metrics")
+        ThreadingHTTPServer((BIND_HOST, port), TextfileHandler).serve_forever()
+    else:
+        sys.stdout.write(METRICS_FILE.read_text(encoding="utf-8") if METRICS_FILE.exists() else "")
@@ -1,7 +1,17 @@
 # results.py
 import streamlit as st
-from logic import get_last_matchday, get_users_hits_last_matchday, get_matches, get_match_predictions, update_results, get_jackpot_for_matchday
+from logic import get_last_matchday, get_users_hits_last_matchday, get_matches, get_match_predictions, update_results, get_jackpot_for_matchday, get_jornada_contenders, get_pools
 import pandas as pd
+import streamlit.components.v1 as components
+from render import load_page
+from pools import pool_names, resolve_pool
+from profiling import profile_script
+
+# Opt-in profile of this run (FCF_PROFILE=1, or FCF_PROFILE=query and ?profile=1)
+profile_script("results", st.query_params.get("profile"))
+
+# Pool chosen on the main page (or ?pool=<id>)
+pool_id = resolve_pool(st.query_params.get("pool", st.session_state.get("pool_id")), pool_names(get_pools()))
 
 
 with st.expander("🔄 Manual data refresh"):
@@ -20,6 +30,14 @@ st.title("📋 Jornada Results - Futsal Predictor")
 
 # --- Get current or last jornada ---
 matchday = get_last_matchday()
+
+# --- Pre-rendered page, rebuilt by update_data after every refresh ---
+# Only while it still shows this jornada, and never while the jornada is being played
+prebuilt = load_page("results", pool_id, matchday["number"] if matchday else None)
+if prebuilt:
+    components.html(prebuilt, height=3000, scrolling=True)
+    st.stop()
+
 if not matchday:
     st.warning("⚠️ No jornada data found.")
     st.stop()
@@ -31,6 +49,8 @@ matches = get_matches(matchday["number"])
 if not matches:
     st.info("No matches available for this jornada.")
     st.stop()
+# Everyone's picks for the jornada in one read, grouped by match
+predictions_by_match = get_match_predictions(matchday["number"], pool_id)
 
 # --- Custom CSS ---
 st.markdown("""
@@ -69,14 +89,14 @@ st.markdown("""
 # ---------------- JACKPOT ----------------
 st.subheader("💰 Current Jackpot")
 
-jackpot_value = get_jackpot_for_matchday(matchday["number"])
+jackpot_value = get_jackpot_for_matchday(matchday["number"], pool_id)
 st.metric(label=f"Total Jackpot for Jornada {matchday['number']}", value=f"{jackpot_value} €")
 
 
 # ---------------- LAST MATCHDAY PERFORMANCE ----------------
 st.subheader("🎯 Matchday Hit Ratios")
 
-ratios = get_users_hits_last_matchday()
+ratios = get_users_hits_last_matchday(pool_id)
 if ratios:
     df_ratios = pd.DataFrame(ratios)
     df_ratios = df_ratios.rename(columns={"username": "User", "hit_ratio": "Hit Ratio"})
@@ -87,6 +107,29 @@ else:
     st.info("No hit ratio data available yet for the last matchday.")
 
 
+# ---------------- WHO CAN STILL WIN ----------------
+if any(m.get("result") is None for m in matches):
+    st.subheader("🎲 Who Can Still Win")
+
+    contenders = get_jornada_contenders(matchday["number"], pool_id)
+    if contenders:
+        df_cont = pd.DataFrame(contenders)
+        df_cont["Full House"] = df_cont["full_house_possible"].map({True: "✅", False: "❌"})
+        df_cont["Jackpot (%)"] = (df_cont["p_jackpot"] * 100).round(2)
+        df_cont["Most Hits (%)"] = (df_cont["p_top"] * 100).round(1)
+        df_cont = df_cont.rename(columns={
+            "username": "User",
+            "current_hits": "Hits",
+            "max_hits": "Max Hits",
+        })
+        st.dataframe(
+            df_cont[["User", "Full House", "Hits", "Max Hits", "Jackpot (%)", "Most Hits (%)"]],
+            hide_index=True, use_container_width=True
+        )
+    else:
+        st.info("No predictions for this jornada yet.")
+
+
 # --- Display each match with results and predictions ---
 for match in matches:
     home_team = match["home_team"]
@@ -116,7 +159,7 @@ for match in matches:
         st.markdown("<p style='text-align:center;font-size:16px;color:gray;'>Match not played yet</p>", unsafe_allow_html=True)
 
     # --- Get predictions for this match ---
-    predictions = get_match_predictions(home_team, away_team)
+    predictions = predictions_by_match.get(match["match_id"])
     if not predictions:
         st.markdown("<p style='text-align:center;color:gray;'>No predictions yet.</p>", unsafe_allow_html=True)
     else:
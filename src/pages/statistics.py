@@ -1,13 +1,33 @@
 import streamlit as st
 import pandas as pd
-from logic import get_top_users, get_classification, get_users_hits_last_matchday, get_historic_winners
+import streamlit.components.v1 as components
+from render import load_page
+from pools import pool_names, resolve_pool
+import altair as alt
+from logic import get_top_users, get_classification, get_users_hits_last_matchday, get_historic_winners, get_final_position_odds, get_user_timeline, get_last_matchday, get_pools
+from profiling import profile_script
+
+# Opt-in profile of this run (FCF_PROFILE=1, or FCF_PROFILE=query and ?profile=1)
+profile_script("statistics", st.query_params.get("profile"))
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="📊 Statistics", layout="wide")
 
+# Pool chosen on the main page (or ?pool=<id>)
+pool_id = resolve_pool(st.query_params.get("pool", st.session_state.get("pool_id")), pool_names(get_pools()))
+
 st.title("📊 Competition Statistics")
 st.markdown("Explore the latest stats, rankings, and hit ratios from the prediction game.")
 
+# ---------------- PRE-RENDERED PAGE ----------------
+# Rebuilt by update_data after every refresh, so most visits only check the matchday
+last_matchday = get_last_matchday()
+prebuilt = load_page("statistics", pool_id, last_matchday["number"] if last_matchday else None)
+if prebuilt:
+    components.html(prebuilt, height=2600, scrolling=True)
+    st.caption("Data updates automatically from Supabase · Powered by Streamlit ⚡")
+    st.stop()
+
 # ---------------- CLASSIFICATION TABLE ----------------
 st.subheader("🏆 Classification Table")
 
@@ -20,6 +40,8 @@ if classification:
     df_class["Avg. Away Pts"] = df_class["away_points_ratio"].apply(lambda x: f"{x:.2f}")
     df_class["Avg. GF"] = df_class["avg_goals_favor"].apply(lambda x: f"{x:.2f}")
     df_class["Avg. GA"] = df_class["avg_goals_against"].apply(lambda x: f"{x:.2f}")
+    df_class["Elo"] = df_class["rating"].apply(lambda x: f"{x:.0f}" if pd.notna(x) else "–")
+    df_class["Form"] = df_class["form"].fillna("")
 
     # Create the 'Team' column with image and name
     df_class["Team"] = df_class.apply(
@@ -36,7 +58,7 @@ if classification:
     # Define the columns to display and their order
     display_columns = [
         "Pos.", "Team", "Games Pld",
-        "Avg. Home Pts", "Avg. Away Pts", "Avg. GF", "Avg. GA"
+        "Avg. Home Pts", "Avg. Away Pts", "Avg. GF", "Avg. GA", "Elo", "Form"
     ]
 
     # Convert the DataFrame to HTML and render it with st.markdown
@@ -49,10 +71,25 @@ if classification:
 else:
     st.info("No classification data available yet.")
 
+# ---------------- FINAL POSITION ODDS ----------------
+st.subheader("🔮 Final Position Odds")
+
+odds = get_final_position_odds()
+if odds:
+    df_odds = pd.DataFrame(
+        [[f"{p * 100:.1f}%" for p in row["probabilities"]] for row in odds],
+        index=[row["name"] for row in odds],
+        columns=[f"{i}º" for i in range(1, len(odds) + 1)],
+    )
+    st.caption("Probability of each final position after simulating the remaining fixtures 100,000 times.")
+    st.dataframe(df_odds, use_container_width=True)
+else:
+    st.info("No simulation data available yet.")
+
 # ---------------- TOP USERS ----------------
 st.subheader("🔥 Top Users (Most Correct Predictions)")
 
-top_users = get_top_users()
+top_users = get_top_users(pool_id)
 if top_users:
     df_top = pd.DataFrame(top_users)
     df_top = df_top.rename(columns={"username": "User", "hits": "Hits"})
@@ -61,10 +98,28 @@ if top_users:
 else:
     st.info("No prediction data available yet.")
 
+# ---------------- RANK OVER THE SEASON ----------------
+st.subheader("📈 Rank Over the Season")
+
+timeline = get_user_timeline(pool_id)
+if timeline:
+    df_timeline = pd.DataFrame(timeline).rename(columns={
+        "username": "User", "jornada": "Jornada", "rank": "Rank", "cumulative_hits": "Total Hits"
+    })
+    chart = alt.Chart(df_timeline).mark_line(point=True).encode(
+        x="Jornada:O",
+        y=alt.Y("Rank:Q", scale=alt.Scale(reverse=True, zero=False)),  # 1st at the top
+        color="User:N",
+        tooltip=["User", "Jornada", "Rank", "Total Hits"],
+    )
+    st.altair_chart(chart, use_container_width=True)
+else:
+    st.info("No decided jornadas yet.")
+
 # ---------------- LAST MATCHDAY PERFORMANCE ----------------
 st.subheader("🎯 Last Matchday Hit Ratios")
 
-ratios = get_users_hits_last_matchday()
+ratios = get_users_hits_last_matchday(pool_id)
 if ratios:
     df_ratios = pd.DataFrame(ratios)
     df_ratios = df_ratios.rename(columns={"username": "User", "hit_ratio": "Hit Ratio"})
@@ -76,7 +131,7 @@ else:
 
 # ---------------- Get ALL HISTORIC WINNERS ----------------
 st.subheader("🏆 Historic Winners")
-winners = get_historic_winners()
+winners = get_historic_winners(pool_id=pool_id)
 if not winners:
     st.info("😔 No winners found yet.")
 else:
@@ -0,0 +1,35 @@
+# --- Prediction pools ---
+# Every user, prediction, jackpot and winner belongs to a pool (a group of friends playing
+# the same calendar). Pool 1 is the original group and is seeded by migration 5.
+
+DEFAULT_POOL = 1
+DEFAULT_POOL_NAME = "Senior B"
+DEFAULT_MEMBERS = [
+    "Adri", "Aaron", "Alvaro", "Jorge", "Quinco", "Callau",
+    "Torrema", "Rovira", "Gorka", "Joan", "Guille", "Sergio",
+    "Gimeno", "Chete", "Javi", "Luca",
+]
+
+
+def pool_dir(base, pool_id):
+    """Directory for a pool's prebuilt files: the base itself for the default pool, a subfolder otherwise."""
+    return base if int(pool_id) == DEFAULT_POOL else base / f"pool-{int(pool_id)}"
+
+
+def pool_names(rows):
+    """{pool_id: name} for the rows of the pools table, with the default pool when there are none."""
+    return {p["id"]: p["name"] for p in rows} or {DEFAULT_POOL: DEFAULT_POOL_NAME}
+
+
+def resolve_pool(requested, pools):
+    """
+    Pool id for a ?pool value (or the session's choice): missing, malformed or unknown ids
+    fall back to the default pool, or to the first pool when the default doesn't exist.
+    """
+    try:
+        pool_id = int(requested)
+    except (TypeError, ValueError):
+        pool_id = DEFAULT_POOL
+    if pool_id in pools:
+        return pool_id
+    return DEFAULT_POOL if DEFAULT_POOL in pools else next(iter(pools))
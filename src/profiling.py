@@ -0,0 +1,148 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import BASE_DIR
+
+# --- Opt-in sampling profiler ---
+# With FCF_PROFILE=1 a background thread samples the stack of the profiled code every few
+# milliseconds and saves the counts in the folded-stack format that flame graph tools read
+# (speedscope.app, flamegraph.pl). FCF_PROFILE=query profiles only the page runs opened with
+# ?profile=1; without FCF_PROFILE the query parameter is ignored, so visitors can't make the
+# app profile itself. When profiling is off the only cost is one environment lookup per page
+# run or update phase.
+#
+#   python src/profiling.py            # list saved profiles
+#   python src/profiling.py <file>     # hottest functions of one profile
+
+PROFILE_DIR = BASE_DIR / "data" / "profiles"
+SAMPLE_INTERVAL = 0.005  # seconds between samples
+MAX_PROFILES = 50  # oldest profiles are deleted beyond this many
+
+
+def profiling_enabled(flag=None):
+    """
+    True when FCF_PROFILE is on, or when it is `query` and `flag` (a ?profile= value)
+    asks for it.
+    """
+    values = ("1", "true", "yes")
+    mode = os.getenv("FCF_PROFILE", "").lower()
+    return mode in values or (mode == "query" and str(flag).lower() in values)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _stack(frame, root):
+    """Folded stack from `root` down to `frame`, or None when `root` is no longer running."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        if frame is root:
+            return ";".join(reversed(names))
+        frame = frame.f_back
+    return None
+
+
+def save_profile(label, counts, elapsed):
+    """Write folded stacks (`a;b;c <samples>` per line) to PROFILE_DIR/<label>-<timestamp>.folded."""
+    if not counts:
+        return None
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{label}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.folded"
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, samples in counts.most_common():
+            f.write(f"{stack} {samples}\n")
+    print(f"🔹 Profile '{label}' saved to {path} ({sum(counts.values())} samples, {elapsed:.2f}s)")
+    prune_profiles(MAX_PROFILES)
+    return path
+
+
+def prune_profiles(keep):
+    """Delete all but the `keep` newest profiles in PROFILE_DIR."""
+    profiles = sorted(PROFILE_DIR.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in profiles[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def _start_sampler(label, root, done):
+    """Sample the calling thread below `root` until `done` is set or `root` returns."""
+    thread_id = threading.get_ident()
+
+    def run():
+        counts = Counter()
+        start = time.perf_counter()
+        try:
+            while not done.wait(SAMPLE_INTERVAL):
+                stack = _stack(sys._current_frames().get(thread_id), root)
+                if stack is None:
+                    break
+                counts[stack] += 1
+            save_profile(label, counts, time.perf_counter() - start)
+        except Exception as e:
+            print(f"⚠️ Error in profiler '{label}': {e}")
+
+    sampler = threading.Thread(target=run, name=f"profiler-{label}", daemon=True)
+    sampler.start()
+    return sampler
+
+
+@contextmanager
+def profiled(label):
+    """Profile the body of a `with` block when FCF_PROFILE is set."""
+    if not profiling_enabled():
+        yield
+        return
+    done = threading.Event()
+    sampler = _start_sampler(label, sys._getframe(2), done)
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+
+
+def profile_script(label, flag=None):
+    """
+    Profile the rest of the calling Streamlit script run. Call it at the top of a page with
+    the ?profile= value (honoured only with FCF_PROFILE=query); sampling stops by itself
+    when the run ends, st.stop() included.
+    """
+    if profiling_enabled(flag):
+        _start_sampler(label, sys._getframe(1), threading.Event())
+
+
+def hottest(path, limit=15):
+    """(function, self samples, total samples) for the functions of a saved profile."""
+    own, total = Counter(), Counter()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stack, samples = line.rstrip("\n").rsplit(" ", 1)
+            frames = stack.split(";")
+            own[frames[-1]] += int(samples)
+            for name in set(frames):
+                total[name] += int(samples)
+    return [(name, samples, total[name]) for name, samples in own.most_common(limit)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List saved profiles or show the hottest functions of one.")
+    parser.add_argument("profile", nargs="?", help="a .folded file written by the profiler")
+    parser.add_argument("--limit", type=int, default=15)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(f"{'self':>6} {'total':>6}  function")
+        for name, own, total in hottest(args.profile, args.limit):
+            print(f"{own:>6} {total:>6}  {name}")
+    else:
+        for path in sorted(PROFILE_DIR.glob("*.folded")):
+            print(path.name)
@@ -0,0 +1,163 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# --- Team strength ratings ---
+# Elo ratings with a home advantage and a goal-difference multiplier (as in the World
+# Football Elo ratings), plus each team's form over its last five results. Every finished
+# match is one O(1) update of two teams; applying the same matches in the same order
+# always yields the same ratings, so a stored history can be replayed and checked.
+#
+#   python src/ratings.py            # replay the scraped season and print the ratings
+#   python src/ratings.py --verify   # replay the stored history and compare
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 30.0
+HOME_ADVANTAGE = 60.0
+FORM_LENGTH = 5
+TOLERANCE = 1e-6  # ratings are stored as REAL
+
+
+def expected_score(home_rating, away_rating):
+    """Home side's expected score (0..1) with the home advantage added."""
+    return 1 / (1 + 10 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400))
+
+
+def goal_multiplier(goal_diff):
+    """Wins by more goals move ratings more: 1, 1.5, then (11 + diff) / 8."""
+    goal_diff = abs(goal_diff)
+    if goal_diff <= 1:
+        return 1.0
+    if goal_diff == 2:
+        return 1.5
+    return (11 + goal_diff) / 8
+
+
+def rating_change(home_rating, away_rating, home_score, away_score):
+    """Points the home side gains (the away side loses the same)."""
+    actual = 1.0 if home_score > away_score else 0.5 if home_score == away_score else 0.0
+    return K_FACTOR * goal_multiplier(home_score - away_score) * (actual - expected_score(home_rating, away_rating))
+
+
+def _outcome(goals_for, goals_against):
+    return "W" if goals_for > goals_against else "D" if goals_for == goals_against else "L"
+
+
+class Ratings:
+    """Current rating, form and match count per team id; `seq` numbers the matches applied."""
+
+    def __init__(self):
+        self.rating = {}
+        self.form = {}
+        self.matches = {}
+        self.seq = 0
+
+    @classmethod
+    def from_snapshot(cls, rows, seq):
+        """Restore from team_ratings rows and the last applied sequence number."""
+        ratings = cls()
+        for row in rows:
+            ratings.rating[row["team_id"]] = row["rating"]
+            ratings.form[row["team_id"]] = row["form"]
+            ratings.matches[row["team_id"]] = row["matches"]
+        ratings.seq = seq
+        return ratings
+
+    def apply(self, match_id, jornada, home_id, away_id, home_score, away_score):
+        """Rate one finished match. Returns its two rating_history rows (home first)."""
+        home_before = self.rating.get(home_id, INITIAL_RATING)
+        away_before = self.rating.get(away_id, INITIAL_RATING)
+        delta = rating_change(home_before, away_before, home_score, away_score)
+        self.seq += 1
+
+        rows = []
+        for team, opponent, home, gf, ga, before, after in (
+            (home_id, away_id, 1, home_score, away_score, home_before, home_before + delta),
+            (away_id, home_id, 0, away_score, home_score, away_before, away_before - delta),
+        ):
+            self.rating[team] = after
+            self.form[team] = (self.form.get(team, "") + _outcome(gf, ga))[-FORM_LENGTH:]
+            self.matches[team] = self.matches.get(team, 0) + 1
+            rows.append({
+                "team_id": team, "match_id": match_id, "seq": self.seq, "jornada": jornada,
+                "opponent_id": opponent, "home": home, "goals_for": gf, "goals_against": ga,
+                "rating_before": before, "rating_after": after,
+            })
+        return rows
+
+    def snapshot(self, teams=None):
+        """team_ratings rows for `teams` (every rated team by default)."""
+        return [
+            {"team_id": t, "rating": self.rating[t], "form": self.form[t], "matches": self.matches[t]}
+            for t in sorted(teams if teams is not None else self.rating)
+        ]
+
+
+def finished_matches(season):
+    """
+    (match_id, jornada, home_id, away_id, home_score, away_score) of every finished match,
+    in rating order: by jornada date (undated jornadas last), jornada number, then match id.
+    """
+    jornadas = sorted(season.jornadas, key=lambda j: (j.date or date.max, j.number))
+    return [
+        (m.id, m.jornada, m.home_id, m.away_id, m.home_score, m.away_score)
+        for j in jornadas
+        for m in sorted(j.matches, key=lambda m: m.id if m.id is not None else -1)
+        if m.played and m.id is not None and m.home_score is not None and m.away_score is not None
+    ]
+
+
+def replay(matches):
+    """Rate `matches` from scratch, in the given order. Returns (Ratings, history rows)."""
+    ratings = Ratings()
+    history = []
+    for match in matches:
+        history.extend(ratings.apply(*match))
+    return ratings, history
+
+
+def verify_history(history):
+    """
+    Replay stored rating_history rows (any order) by their sequence numbers and return the
+    rows whose stored ratings differ from the replay; an empty list means it checks out.
+    """
+    home_rows = sorted((r for r in history if r["home"]), key=lambda r: r["seq"])
+    matches = [(r["match_id"], r["jornada"], r["team_id"], r["opponent_id"], r["goals_for"], r["goals_against"])
+               for r in home_rows]
+    _, replayed = replay(matches)
+    expected = {(r["team_id"], r["match_id"]): r for r in replayed}
+    return [
+        r for r in history
+        if (r["team_id"], r["match_id"]) not in expected
+        or abs(expected[(r["team_id"], r["match_id"])]["rating_after"] - r["rating_after"]) > TOLERANCE
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay team ratings from the calendar or verify the stored history.")
+    parser.add_argument("--verify", action="store_true", help="replay rating_history from the database and compare")
+    args = parser.parse_args()
+
+    if args.verify:
+        from db.offline import offline_enabled, get_offline_client
+        from db.paging import fetch_all
+        if offline_enabled():
+            client = get_offline_client()
+        else:
+            from supabase import create_client
+            from db.update import get_secret
+            client = create_client(get_secret("SUPABASE_URL"), get_secret("SUPABASE_KEY"))
+        history = fetch_all(lambda: client.table("rating_history").select("*").order("seq").order("team_id"))
+        mismatches = verify_history(history)
+        print(f"{'✅' if not mismatches else '❌'} {len(history)} history rows replayed, {len(mismatches)} mismatches.")
+        sys.exit(1 if mismatches else 0)
+
+    from season import load_season
+    season = load_season()
+    names = {team.id: team.name for team in season.teams.values()}
+    ratings, _ = replay(finished_matches(season))
+    for team in sorted(ratings.rating, key=ratings.rating.get, reverse=True):
+        print(f"{names.get(team, team):<40} {ratings.rating[team]:7.1f}  {ratings.form[team]}")
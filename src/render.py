@@ -0,0 +1,344 @@
+import html
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from export import build_standings, build_leaderboard, serve, write_atomic
+from live_jornada import jornada_contenders
+from db.paging import fetch_all
+from db.pipeline import log
+from pools import DEFAULT_POOL, pool_dir
+from season import DATA_FILE
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SITE_DIR = BASE_DIR / "data" / "site"   # default pool; other pools in site/pool-<id>/
+
+DEFAULT_PORT = 8602
+
+# What each prebuilt page was rendered for, so pages can tell when it's out of date
+STAMP_FILE = "pages.json"
+
+PAGE_CSS = """
+body { font-family: "Source Sans Pro", sans-serif; color:#31333F; margin:0; padding:0 8px; }
+h2 { font-size:22px; margin:28px 0 10px; }
+table { border-collapse:collapse; width:100%; font-size:14px; }
+th, td { padding:6px 8px; border-bottom:1px solid #eee; text-align:left; }
+th { background:#fafafa; }
+.bar-row { display:flex; align-items:center; gap:8px; margin:4px 0; font-size:14px; }
+.bar-label { width:120px; text-align:right; }
+.bar { background:#4CAF50; height:16px; border-radius:3px; }
+.match-card { border:1px solid #ddd; border-radius:10px; padding:12px; margin-bottom:18px;
+              box-shadow:0 2px 6px rgba(0,0,0,0.08); background-color:white; }
+.teams-line { display:flex; justify-content:space-between; align-items:center;
+              font-weight:600; font-size:16px; margin-bottom:8px; }
+.prediction-tag { display:inline-block; padding:4px 8px; border-radius:6px; font-weight:500;
+                  color:white; margin:2px; }
+.prediction-correct { background-color:#4CAF50; }
+.prediction-wrong { background-color:#E74C3C; }
+.prediction-pending { background-color:#BDC3C7; color:black; }
+.muted { color:gray; text-align:center; }
+.footer { color:gray; font-size:12px; margin:24px 0; }
+"""
+
+
+def _e(value):
+    return html.escape(str(value))
+
+
+def _document(title, body):
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{_e(title)}</title>
+<style>{PAGE_CSS}</style>
+</head>
+<body>
+{body}
+<p class="footer">Pre-rendered {datetime.utcnow():%Y-%m-%d %H:%M} UTC</p>
+</body>
+</html>
+"""
+
+
+def _bar_chart(rows, label_key, value_key, suffix=""):
+    """Horizontal CSS bar chart, no JavaScript needed."""
+    if not rows:
+        return ""
+    top = max(r[value_key] for r in rows) or 1
+    return "".join(
+        f"<div class='bar-row'><span class='bar-label'>{_e(r[label_key])}</span>"
+        f"<span class='bar' style='width:{r[value_key] / top * 70:.1f}%'></span>"
+        f"<span>{_e(r[value_key])}{suffix}</span></div>"
+        for r in rows
+    )
+
+
+RANK_COLORS = ["#4CAF50", "#E74C3C", "#3498DB", "#F39C12", "#9B59B6", "#1ABC9C", "#E67E22", "#34495E"]
+
+
+def _rank_chart(timeline):
+    """SVG line chart of every user's rank after each jornada, 1st at the top."""
+    if not timeline:
+        return ""
+    jornadas = sorted({r["jornada"] for r in timeline})
+    users = sorted({r["username"] for r in timeline})
+    worst = max(r["rank"] for r in timeline)
+    step_x, step_y, left, top, right = 34, 18, 36, 16, 110
+    width = left + step_x * max(len(jornadas) - 1, 1) + right
+    height = top * 2 + step_y * max(worst - 1, 1)
+    x = {j: left + i * step_x for i, j in enumerate(jornadas)}
+
+    def y(rank):
+        return top + (rank - 1) * step_y
+
+    parts = [f"<svg viewBox='0 0 {width} {height + 20}' width='100%' role='img' aria-label='Rank over the season'>"]
+    for j in jornadas:
+        parts.append(f"<text x='{x[j]}' y='{height + 14}' font-size='10' text-anchor='middle' fill='gray'>{j}</text>")
+    for rank in range(1, worst + 1):
+        parts.append(f"<text x='{left - 8}' y='{y(rank) + 4}' font-size='10' text-anchor='end' fill='gray'>{rank}</text>")
+
+    by_user = {u: [] for u in users}
+    for r in sorted(timeline, key=lambda r: r["jornada"]):
+        by_user[r["username"]].append((x[r["jornada"]], y(r["rank"])))
+    for i, (user, points) in enumerate(by_user.items()):
+        color = RANK_COLORS[i % len(RANK_COLORS)]
+        path = " ".join(f"{px},{py}" for px, py in points)
+        end_x, end_y = points[-1]
+        parts.append(f"<polyline points='{path}' fill='none' stroke='{color}' stroke-width='2'><title>{_e(user)}</title></polyline>")
+        parts.append(f"<text x='{end_x + 6}' y='{end_y + 4}' font-size='11' fill='{color}'>{_e(user)}</text>")
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def _rating(value):
+    return f"{value:.0f}" if value is not None else "–"
+
+
+def _team(name, logo):
+    img = f"<img src='{_e(logo)}' width='30' style='vertical-align:middle; margin-right:5px;'>" if logo else ""
+    return f"{img}{_e(name)}"
+
+
+# --- Statistics page ---
+def render_statistics(classification, top_users, ratios, winners, odds=None, timeline=None):
+    parts = ["<h2>🏆 Classification Table</h2>"]
+    if classification:
+        rows = "".join(
+            f"<tr><td>{c['position']}</td><td>{_team(c['name'], c.get('logo'))}</td>"
+            f"<td>{c['games_played']}</td><td>{c['home_points_ratio']:.2f}</td>"
+            f"<td>{c['away_points_ratio']:.2f}</td><td>{c['avg_goals_favor']:.2f}</td>"
+            f"<td>{c['avg_goals_against']:.2f}</td><td>{_rating(c.get('rating'))}</td>"
+            f"<td>{_e(c.get('form') or '')}</td></tr>"
+            for c in classification
+        )
+        parts.append(
+            "<table><tr><th>Pos.</th><th>Team</th><th>Games Pld</th><th>Avg. Home Pts</th>"
+            f"<th>Avg. Away Pts</th><th>Avg. GF</th><th>Avg. GA</th><th>Elo</th><th>Form</th></tr>{rows}</table>"
+        )
+    else:
+        parts.append("<p class='muted'>No classification data available yet.</p>")
+
+    if odds:
+        header = "".join(f"<th>{i}º</th>" for i in range(1, len(odds) + 1))
+        rows = "".join(
+            f"<tr><td>{_e(o['name'])}</td>" + "".join(f"<td>{p * 100:.1f}%</td>" for p in o["probabilities"]) + "</tr>"
+            for o in odds
+        )
+        parts.append(f"<h2>🔮 Final Position Odds</h2><table><tr><th>Team</th>{header}</tr>{rows}</table>")
+
+    parts.append("<h2>🔥 Top Users (Most Correct Predictions)</h2>")
+    parts.append(_bar_chart(top_users, "username", "hits") or "<p class='muted'>No prediction data available yet.</p>")
+
+    parts.append("<h2>📈 Rank Over the Season</h2>")
+    parts.append(_rank_chart(timeline) or "<p class='muted'>No decided jornadas yet.</p>")
+
+    parts.append("<h2>🎯 Last Matchday Hit Ratios</h2>")
+    ratio_rows = [{"username": r["username"], "pct": round(r["hit_ratio"] * 100)} for r in ratios]
+    parts.append(_bar_chart(ratio_rows, "username", "pct", "%")
+                 or "<p class='muted'>No hit ratio data available yet for the last matchday.</p>")
+
+    parts.append("<h2>🏆 Historic Winners</h2>")
+    if winners:
+        parts.append("<ul>" + "".join(
+            f"<li>🥇 <b>{_e(w['username'])}</b> won Jornada <b>{_e(w['matchday'])}</b></li>" for w in winners
+        ) + "</ul>")
+    else:
+        parts.append("<p class='muted'>😔 No winners found yet.</p>")
+
+    return _document("Statistics", "\n".join(parts))
+
+
+# --- Results page ---
+def render_results(matchday, matches, jackpot, ratios, predictions_by_match, contenders=None):
+    parts = [
+        f"<h2>Jornada {_e(matchday['number'])} - {_e(matchday['date'])}</h2>",
+        f"<h2>💰 Current Jackpot</h2><p style='font-size:28px;margin:0'>{_e(jackpot)} €</p>",
+        "<h2>🎯 Matchday Hit Ratios</h2>",
+    ]
+    ratio_rows = [{"username": r["username"], "pct": round(r["hit_ratio"] * 100)} for r in ratios]
+    parts.append(_bar_chart(ratio_rows, "username", "pct", "%")
+                 or "<p class='muted'>No hit ratio data available yet for the last matchday.</p>")
+
+    if contenders:
+        rows = "".join(
+            f"<tr><td>{_e(c['username'])}</td><td>{'✅' if c['full_house_possible'] else '❌'}</td>"
+            f"<td>{c['current_hits']}</td><td>{c['max_hits']}</td>"
+            f"<td>{c['p_jackpot'] * 100:.2f}%</td><td>{c['p_top'] * 100:.1f}%</td></tr>"
+            for c in contenders
+        )
+        parts.append(
+            "<h2>🎲 Who Can Still Win</h2><table><tr><th>User</th><th>Full House</th><th>Hits</th>"
+            f"<th>Max Hits</th><th>Jackpot</th><th>Most Hits</th></tr>{rows}</table>"
+        )
+
+    for match in matches:
+        result = match.get("result")
+        card = [
+            "<div class='match-card'><div class='teams-line'>"
+            f"<div>{_team(match['home_team'], match.get('home_logo'))}</div><div>vs</div>"
+            f"<div>{_e(match['away_team'])} "
+            + (f"<img src='{_e(match['away_logo'])}' width='30'>" if match.get("away_logo") else "")
+            + "</div></div>"
+        ]
+        if result:
+            card.append(f"<p style='text-align:center;font-size:18px;color:#4CAF50;'>Final Result: <b>{_e(result)}</b></p>")
+        else:
+            card.append("<p class='muted'>Match not played yet</p>")
+
+        predictions = predictions_by_match.get(match["match_id"], {})
+        if not any(predictions.values()):
+            card.append("<p class='muted'>No predictions yet.</p>")
+        for outcome, users in predictions.items():
+            if not users:
+                continue
+            color_class = (
+                "prediction-correct" if result == outcome
+                else "prediction-wrong" if result and result != outcome
+                else "prediction-pending"
+            )
+            tags = " ".join(f"<span class='prediction-tag {color_class}'>{_e(u)}</span>" for u in users)
+            card.append(f"<div style='text-align:center;margin-bottom:8px;'><b>{outcome}</b>: {tags}</div>")
+
+        card.append("</div>")
+        parts.append("".join(card))
+
+    return _document("Jornada Results", "\n".join(parts))
+
+
+# --- Data loading and writing ---
+def _last_matchday(supabase):
+    today = datetime.today().strftime("%Y-%m-%d")
+    data = (
+        supabase.table("matchdays").select("number, date")
+        .lte("date", today).order("date", desc=True).limit(1)
+        .execute().data or []
+    )
+    return data[0] if data else None
+
+
+def render_site(supabase, pool_id=DEFAULT_POOL, odds=None):
+    """
+    Query everything a pool's statistics and results pages show once and write them as
+    static HTML. `odds` are the final position odds of simulation.load_or_simulate (the
+    refresh passes its simulation stage's output). Each file is replaced atomically and
+    pages.json goes last, so a page never pairs with a stamp it wasn't rendered for.
+    """
+    site_dir = pool_dir(SITE_DIR, pool_id)
+    site_dir.mkdir(parents=True, exist_ok=True)
+    matchday = _last_matchday(supabase)
+    logos = {t["id"]: t["logo"] for t in fetch_all(lambda: supabase.table("teams").select("id, logo").order("id"))}
+
+    predictions, results = [], []
+    if matchday:
+        predictions = fetch_all(lambda: supabase.table("predictions").select(
+            "username, jornada, match_id, home_team, away_team, prediction"
+        ).eq("pool_id", pool_id).eq("jornada", matchday["number"]).order("username").order("match_id"))
+        results = supabase.table("results").select(
+            "matchday, match_id, home_team_id, away_team_id, home_team, away_team, result"
+        ).eq("matchday", matchday["number"]).order("match_id").execute().data or []
+
+    # Same 'jornada_hit_ratios' view as logic.get_users_hits_last_matchday
+    hit_ratios = fetch_all(lambda: supabase.table("jornada_hit_ratios").select("username, hit_ratio")
+                           .eq("pool_id", pool_id).eq("jornada", matchday["number"]).order("username")) \
+        if matchday else []
+    ratios = sorted(
+        [{"username": r["username"], "hit_ratio": round(float(r["hit_ratio"]), 2)} for r in hit_ratios],
+        key=lambda x: x["hit_ratio"], reverse=True
+    )
+
+    winners = fetch_all(lambda: supabase.table("winners").select("username, matchday")
+                        .eq("pool_id", pool_id).order("matchday").order("username"))
+    winners.sort(key=lambda x: (x["matchday"], x["username"]))
+
+    timeline = fetch_all(lambda: supabase.table("user_timeline").select("username, jornada, rank")
+                         .eq("pool_id", pool_id).order("jornada").order("username"))
+
+    statistics = render_statistics(
+        build_standings(supabase, pool_id), build_leaderboard(supabase, pool_id), ratios, winners, odds, timeline
+    )
+    write_atomic(site_dir / "statistics.html", statistics)
+    stamps = {"statistics": {"matchday": matchday["number"] if matchday else None, "live": False}}
+
+    if matchday:
+        matches = [
+            {"match_id": r["match_id"],
+             "home_team": r["home_team"], "home_logo": logos.get(r["home_team_id"]),
+             "away_team": r["away_team"], "away_logo": logos.get(r["away_team_id"]),
+             "result": r["result"]}
+            for r in results
+        ]
+        by_match = {}
+        for p in predictions:
+            options = by_match.setdefault(p["match_id"], {"1": [], "X": [], "2": []})
+            options.setdefault(p["prediction"], []).append(p["username"])
+
+        jackpot = (
+            supabase.table("jackpot").select("accumulated")
+            .eq("pool_id", pool_id).eq("matchday", matchday["number"]).execute().data
+        )
+        contenders = None
+        if any(m["result"] is None for m in matches):
+            contenders = jornada_contenders(predictions, results, matchday["number"])
+
+        page = render_results(
+            matchday, matches, jackpot[0].get("accumulated", 0) if jackpot else 0, ratios, by_match, contenders
+        )
+        write_atomic(site_dir / "results.html", page)
+        # "Who can still win" changes with every save until the jornada is decided
+        stamps["results"] = {"matchday": matchday["number"], "live": contenders is not None}
+
+    write_atomic(site_dir / STAMP_FILE, json.dumps(stamps))
+
+    log(f"✅ Static pages rendered to {site_dir}")
+
+
+def load_page(name, pool_id=DEFAULT_POOL, matchday=None):
+    """
+    Return a pool's prebuilt page HTML, or None when the page should be rendered live:
+    not rendered yet, rendered for another matchday than `matchday` (the current last
+    matchday number), or showing a jornada that was still being played.
+    """
+    site_dir = pool_dir(SITE_DIR, pool_id)
+    path = site_dir / f"{name}.html"
+    if not path.exists() or not (site_dir / STAMP_FILE).exists():
+        return None
+    with open(site_dir / STAMP_FILE, "r", encoding="utf-8") as f:
+        stamp = json.load(f).get(name)
+    if not stamp or stamp["live"] or stamp["matchday"] != matchday:
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(directory=SITE_DIR, port=int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT)
+    else:
+        from supabase import create_client
+        from db.update import get_secret
+        from simulation import load_or_simulate
+        with open(DATA_FILE, "r", encoding="utf-8") as f:
+            odds = load_or_simulate(json.load(f))
+        render_site(create_client(get_secret("SUPABASE_URL"), get_secret("SUPABASE_KEY")), odds=odds)
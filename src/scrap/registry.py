@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from archive import season_from_url
+
+# --- Stable integer ids for teams and matches ---
+# FCF only gives us display names, with stray whitespace ("ICARS ATLETIC  A") that changes
+# between pages now and then. The registry hands out small integer ids the first time a
+# team or fixture is seen and keeps them forever, so every table can join on ints.
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+REGISTRY_FILE = BASE_DIR / "data" / "futbolcalendar" / "registry.json"
+
+
+def team_key(name):
+    """Canonical form of a team name: single spaces, upper case."""
+    return " ".join(name.split()).upper()
+
+
+def load_registry():
+    if not REGISTRY_FILE.exists():
+        return {"teams": {}, "matches": {}}
+    with open(REGISTRY_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_registry(registry):
+    REGISTRY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = REGISTRY_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=4, ensure_ascii=False, sort_keys=True)
+    tmp.replace(REGISTRY_FILE)
+
+
+def _id_for(ids, key):
+    if key not in ids:
+        ids[key] = max(ids.values(), default=0) + 1
+    return ids[key]
+
+
+def assign_ids(calendar, url):
+    """
+    Add home_team_id, away_team_id and match_id to every match of a scraped calendar
+    (in place), registering new teams and fixtures. A fixture is one home/away pairing
+    in a season, so a rescheduled match keeps its id when it moves to another jornada.
+    """
+    season, _ = season_from_url(url)
+    registry = load_registry()
+    before = (len(registry["teams"]), len(registry["matches"]))
+
+    for jornada in calendar:
+        for match in jornada["matches"]:
+            home_id = _id_for(registry["teams"], team_key(match["home_team"]))
+            away_id = _id_for(registry["teams"], team_key(match["away_team"]))
+            match["home_team_id"] = home_id
+            match["away_team_id"] = away_id
+            match["match_id"] = _id_for(registry["matches"], f"{season}:{home_id}:{away_id}")
+
+    if (len(registry["teams"]), len(registry["matches"])) != before:
+        save_registry(registry)
+    return calendar
@@ -0,0 +1,111 @@
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from scrap.scraper import scrap_results_if_changed, update_pending, mark_updated
+from season import build_season, load_season
+from metrics import start_server, write_textfile
+
+# FCF kickoff times are local to Catalonia, whatever the host's time zone
+LOCAL_TZ = ZoneInfo("Europe/Madrid")
+
+# Known kickoff windows around the jornada date (always a Saturday on the FCF calendar):
+# (day offset from the jornada date, first kickoff hour, last kickoff hour, poll interval)
+KICKOFF_WINDOWS = [
+    (-1, 20, 22, timedelta(minutes=5)),   # Friday night
+    (0, 9, 21, timedelta(minutes=5)),     # Saturday
+    (1, 9, 20, timedelta(minutes=5)),     # Sunday
+    (2, 9, 9, timedelta(minutes=30)),     # Monday catch-up for late reports
+]
+
+# Kickoff to final whistle, and how long FCF may take to publish the score
+MATCH_LENGTH = timedelta(hours=1, minutes=30)
+PUBLISH_GRACE = timedelta(hours=2)
+
+# Upper bound for a single sleep so changes to the calendar are picked up
+MAX_SLEEP = timedelta(hours=6)
+
+
+def polling_windows(season):
+    """
+    Return (start, end, interval) tuples for every jornada that still has matches
+    without a result. Polling starts when the first match of a day could be over
+    and stops once the last one should be published. Times are aware, in LOCAL_TZ.
+    """
+    windows = []
+    for jornada in season.jornadas:
+        if jornada.date is None or all(m.played for m in jornada.matches):
+            continue
+        day = datetime.combine(jornada.date, datetime.min.time(), tzinfo=LOCAL_TZ)
+
+        for offset, first_hour, last_hour, interval in KICKOFF_WINDOWS:
+            base = day + timedelta(days=offset)
+            start = base.replace(hour=first_hour) + MATCH_LENGTH
+            end = base.replace(hour=last_hour) + MATCH_LENGTH + PUBLISH_GRACE
+            windows.append((start, end, interval))
+
+    windows.sort()
+    return windows
+
+
+def next_poll(now, windows):
+    """
+    Return (moment, interval) for the next poll, or (None, None) when there is nothing
+    left to poll this season. `moment` equals `now` when we are inside a window;
+    `now` must be aware, like the windows.
+    """
+    for start, end, interval in windows:
+        if end < now:
+            continue
+        if start <= now:
+            return now, interval
+        return start, interval
+    return None, None
+
+
+def poll_once():
+    """
+    Run one conditional scrape and push new data to the database if anything changed.
+    A calendar whose update failed stays pending and is pushed again on the next poll,
+    even when FCF answers 304 by then.
+    """
+    # Imported here so the scheduler can be loaded without Supabase credentials
+    from db.update import update_data
+
+    try:
+        changed = scrap_results_if_changed()
+        if changed or update_pending():
+            print("🔹 New results found, updating database..." if changed else "🔹 Retrying the pending database update...")
+            if update_data():
+                mark_updated()
+                print("✅ Database updated successfully.")
+            else:
+                print("⚠️ Database update incomplete, retrying on the next poll.")
+    except Exception as e:
+        print(f"⚠️ Error in poll_once: {e}")
+        changed = False
+
+    write_textfile()
+    return changed
+
+
+def run_scheduler():
+    """Poll FCF while matches may be finishing and sleep the rest of the week."""
+    print("🔹 Starting kickoff-aware polling scheduler...")
+    start_server()  # /metrics when FCF_METRICS_PORT is set
+    while True:
+        now = datetime.now(LOCAL_TZ)
+        moment, interval = next_poll(now, polling_windows(load_season() or build_season([])))
+
+        if moment is None:
+            print("✅ No pending jornadas left, stopping scheduler.")
+            return
+
+        if moment > now:
+            wait = min(moment - now, MAX_SLEEP)
+            print(f"💤 Next polling window at {moment:%Y-%m-%d %H:%M}, sleeping {wait}.")
+            time.sleep(wait.total_seconds())
+            continue
+
+        poll_once()
+        time.sleep(interval.total_seconds())
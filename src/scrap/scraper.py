@@ -3,17 +3,21 @@ from bs4 import BeautifulSoup
 import json
 from pathlib import Path
 
+from scrap.registry import assign_ids
+from metrics import inc, timed
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data" / "futbolcalendar"
 DATA_FILE = DATA_DIR / "futsal_calendar.json"
+# Validators (ETag / Last-Modified) of the last calendar page we downloaded
+SCRAPE_STATE_FILE = DATA_DIR / ".scrape_state.json"
 
 URL = "https://www.fcf.cat/calendari/2526/futbol-sala/lliga-tercera-divisio-catalana-futbol-sala/bcn-gr11"
 
 
-def scrape_calendar(url):
-    response = requests.get(url)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+def parse_calendar(html):
+    """Parse the FCF calendar page HTML into a list of jornadas with their matches."""
+    soup = BeautifulSoup(html, "html.parser")
 
     data = []
     for table in soup.find_all("table", class_="calendaritable"):
@@ -56,13 +60,101 @@ def scrape_calendar(url):
 
     return data
 
-def scrap_results():
-    print("Scraping FCF futsal calendar...")
-    results = scrape_calendar(URL)
+
+def scrape_calendar(url):
+    with timed("fcf_scrape_seconds"):
+        response = requests.get(url)
+    response.raise_for_status()
+    inc("fcf_scrape_bytes_total", len(response.content))
+    with timed("fcf_parse_seconds"):
+        calendar = parse_calendar(response.text)
+    return assign_ids(calendar, url)
+
+
+def save_calendar(results):
     with open(DATA_FILE, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=4, ensure_ascii=False)
     print(f"✅ Data saved to {DATA_FILE}")
 
 
+def scrap_results():
+    print("Scraping FCF futsal calendar...")
+    results = scrape_calendar(URL)
+    save_calendar(results)
+
+
+def _load_scrape_state():
+    if not SCRAPE_STATE_FILE.exists():
+        return {}
+    try:
+        with open(SCRAPE_STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_scrape_state(state):
+    with open(SCRAPE_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def _load_saved_calendar():
+    if not DATA_FILE.exists():
+        return None
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scrap_results_if_changed(url=URL):
+    """
+    Cheap conditional scrape used by the polling scheduler.
+    Sends the validators of the previous download so FCF can answer 304, and only
+    rewrites the JSON file when the parsed calendar differs from the saved one.
+    Returns True if new data was saved; the saved calendar then stays pending
+    (update_pending) until mark_updated() records that the database has it.
+    """
+    state = _load_scrape_state()
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    with timed("fcf_scrape_seconds"):
+        response = requests.get(url, headers=headers, timeout=30)
+    if response.status_code == 304:
+        inc("fcf_scrape_not_modified_total")
+        return False
+    response.raise_for_status()
+
+    # The page embeds session tokens, so compare parsed data rather than raw HTML
+    inc("fcf_scrape_bytes_total", len(response.content))
+    with timed("fcf_parse_seconds"):
+        results = assign_ids(parse_calendar(response.text), url)
+    changed = results != _load_saved_calendar()
+
+    # Flag the update before saving the calendar, so a crash in between still retries it
+    _save_scrape_state({
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "pending_update": changed or state.get("pending_update", False),
+    })
+    if changed:
+        save_calendar(results)
+    return changed
+
+
+def update_pending():
+    """True while a saved calendar hasn't made it into the database yet."""
+    return bool(_load_scrape_state().get("pending_update"))
+
+
+def mark_updated():
+    """Record that the database is up to date with the saved calendar."""
+    state = _load_scrape_state()
+    if state.get("pending_update"):
+        _save_scrape_state({**state, "pending_update": False})
+
+
 if __name__ == "__main__":
-    scrap_results()
\ No newline at end of file
+    scrap_results()
@@ -0,0 +1,136 @@
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data" / "futbolcalendar"
+DATA_FILE = DATA_DIR / "futsal_calendar.json"
+
+
+@dataclass(slots=True, frozen=True)
+class Team:
+    name: str
+    logo: Optional[str]
+    id: Optional[int] = None        # Stable id from scrap/registry.py
+
+
+@dataclass(slots=True, frozen=True)
+class Match:
+    jornada: int
+    home_team: str
+    away_team: str
+    home_score: Optional[int]
+    away_score: Optional[int]
+    result: Optional[str]           # "1", "X", "2" or None if not played
+    match_report: Optional[str]
+    id: Optional[int] = None        # Stable ids from scrap/registry.py
+    home_id: Optional[int] = None
+    away_id: Optional[int] = None
+
+    @property
+    def played(self):
+        return self.result is not None
+
+    @property
+    def points(self):
+        """(home points, away points) for a played match."""
+        return {"1": (3, 0), "X": (1, 1), "2": (0, 3)}[self.result]
+
+
+@dataclass(slots=True, frozen=True)
+class Jornada:
+    number: int
+    label: str                      # As shown by FCF, e.g. "Jornada 3"
+    date: Optional[date]
+    matches: tuple
+
+
+@dataclass(slots=True, frozen=True)
+class Season:
+    jornadas: tuple
+    teams: dict                     # team id (name if unregistered) -> Team, in order of first appearance
+
+    @property
+    def team_names(self):
+        return [team.name for team in self.teams.values()]
+
+    @property
+    def matches(self):
+        return [m for j in self.jornadas for m in j.matches]
+
+    @property
+    def played_matches(self):
+        return [m for m in self.matches if m.played]
+
+
+def _parse_score(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _outcome(home_score, away_score):
+    if home_score is None or away_score is None:
+        return None
+    if home_score > away_score:
+        return "1"
+    if home_score == away_score:
+        return "X"
+    return "2"
+
+
+def build_season(data):
+    """
+    Normalize the scraped calendar once: integer scores and jornada numbers,
+    parsed dates and precomputed 1/X/2 outcomes.
+    """
+    jornadas = []
+    teams = {}
+
+    for raw in data:
+        number = int("".join(c for c in raw["jornada"] if c.isdigit()) or 0)
+        try:
+            day = datetime.strptime(raw["date"], "%d-%m-%Y").date()
+        except ValueError:
+            print(f"⚠️ Invalid date format in jornada: {raw['date']}")
+            day = None
+
+        matches = []
+        for m in raw["matches"]:
+            # One Team per registry id; FCF's spacing may vary, the first spelling is kept
+            home = teams.setdefault(m.get("home_team_id") or m["home_team"],
+                                    Team(m["home_team"], m.get("home_logo"), m.get("home_team_id")))
+            away = teams.setdefault(m.get("away_team_id") or m["away_team"],
+                                    Team(m["away_team"], m.get("away_logo"), m.get("away_team_id")))
+
+            home_score = _parse_score(m.get("home_score"))
+            away_score = _parse_score(m.get("away_score"))
+            matches.append(Match(
+                jornada=number,
+                home_team=home.name,
+                away_team=away.name,
+                home_score=home_score,
+                away_score=away_score,
+                result=_outcome(home_score, away_score),
+                match_report=m.get("match_report"),
+                id=m.get("match_id"),
+                home_id=m.get("home_team_id"),
+                away_id=m.get("away_team_id"),
+            ))
+
+        jornadas.append(Jornada(number, raw["jornada"], day, tuple(matches)))
+
+    return Season(tuple(jornadas), teams)
+
+
+def load_season():
+    """Read and normalize the local calendar, or None if it hasn't been scraped yet."""
+    if not DATA_FILE.exists():
+        return None
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return build_season(json.load(f))
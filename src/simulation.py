@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from season import build_season
+from standings import Standings
+from metrics import inc
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data" / "futbolcalendar"
+DATA_FILE = DATA_DIR / "futsal_calendar.json"
+SIMULATIONS_DIR = DATA_DIR / "simulations"
+
+# Simulations are split in fixed-size chunks with their own seed, so the output
+# only depends on (data, n_sims, seed) and not on how many processes ran it.
+CHUNK_SIZE = 10_000
+
+# Floor for expected goals so a team that never scored can still score
+MIN_RATE = 0.25
+
+# Worker processes for a simulation. They are spawned, not forked: the refresh and the app
+# run threads (pipeline, outbox flusher, metrics server) that a fork would copy mid-lock.
+# Kept small so a refresh doesn't take every core from the app.
+MAX_PROCESSES = 2
+
+
+def calendar_version(data):
+    """Short content hash of the scraped calendar, used to key cached outputs."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def build_league(season):
+    """
+    Turn the season model into arrays for the simulator: current points / goals per team,
+    the head-to-head matrices of the standings and the fixtures still to be played.
+    """
+    teams = season.team_names
+    standings = Standings.from_season(season)
+    index = {name: i for i, name in enumerate(teams)}
+
+    n = len(teams)
+    points = np.zeros(n, dtype=np.int64)
+    goals_favor = np.zeros(n, dtype=np.int64)
+    goals_against = np.zeros(n, dtype=np.int64)
+    played = np.zeros(n, dtype=np.int64)
+    remaining_home, remaining_away = [], []
+
+    for match in season.matches:
+        h = index[match.home_team]
+        a = index[match.away_team]
+        if not match.played:
+            remaining_home.append(h)
+            remaining_away.append(a)
+            continue
+
+        home_points, away_points = match.points
+        points[[h, a]] += [home_points, away_points]
+        goals_favor[[h, a]] += [match.home_score, match.away_score]
+        goals_against[[h, a]] += [match.away_score, match.home_score]
+        played[[h, a]] += 1
+
+    return {
+        "teams": teams,
+        "points": points,
+        "goals_favor": goals_favor,
+        "goals_against": goals_against,
+        "played": played,
+        "h2h_points": standings.points,
+        "h2h_goals": standings.goals,
+        "h2h_games": standings.games,
+        "home": np.array(remaining_home, dtype=np.int64),
+        "away": np.array(remaining_away, dtype=np.int64),
+    }
+
+
+def scoring_rates(league):
+    """
+    Expected goals for the home and away side of every remaining fixture,
+    from the same avg_goals_favor / avg_goals_against figures as the classification.
+    Teams without games fall back to the league average.
+    """
+    played = league["played"]
+    total_games = max(played.sum(), 1)
+    league_avg = league["goals_favor"].sum() / total_games
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_favor = np.where(played > 0, league["goals_favor"] / played, league_avg)
+        avg_against = np.where(played > 0, league["goals_against"] / played, league_avg)
+
+    home, away = league["home"], league["away"]
+    lam_home = np.maximum((avg_favor[home] + avg_against[away]) / 2, MIN_RATE)
+    lam_away = np.maximum((avg_favor[away] + avg_against[home]) / 2, MIN_RATE)
+    return lam_home, lam_away
+
+
+def _simulate_chunk(args):
+    """Play `n` seasons and return a teams × positions count matrix."""
+    seed, n, league, lam_home, lam_away = args
+    rng = np.random.default_rng(seed)
+    n_teams = len(league["teams"])
+    home, away = league["home"], league["away"]
+
+    home_goals = rng.poisson(lam_home, size=(n, len(home)))
+    away_goals = rng.poisson(lam_away, size=(n, len(away)))
+
+    home_pts = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_pts = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+
+    # Scatter fixture outcomes onto teams with one-hot matrices (fixtures × teams)
+    home_onehot = np.zeros((len(home), n_teams), dtype=np.int64)
+    home_onehot[np.arange(len(home)), home] = 1
+    away_onehot = np.zeros((len(away), n_teams), dtype=np.int64)
+    away_onehot[np.arange(len(away)), away] = 1
+
+    points = league["points"] + home_pts @ home_onehot + away_pts @ away_onehot
+
+    # Points first; a simulation with teams level on points is ranked like the real table,
+    # from its head-to-head matrices (flattened team × team; float matmuls, exact for these sizes)
+    order = np.argsort(-points, axis=1, kind="stable")  # order[s, p] = team in position p of simulation s
+    sorted_points = np.take_along_axis(points, order, axis=1)
+    tied = np.flatnonzero((np.diff(sorted_points, axis=1) == 0).any(axis=1))
+    if len(tied):
+        pairs = np.arange(n_teams * n_teams)[None, :]
+        pair_home = ((home * n_teams + away)[:, None] == pairs).astype(float)
+        pair_away = ((away * n_teams + home)[:, None] == pairs).astype(float)
+        h2h_points = league["h2h_points"].ravel() + np.rint(home_pts[tied] @ pair_home + away_pts[tied] @ pair_away).astype(np.int64)
+        h2h_goals = league["h2h_goals"].ravel() + np.rint(home_goals[tied] @ pair_home + away_goals[tied] @ pair_away).astype(np.int64)
+        h2h_games = league["h2h_games"] + np.rint(pair_home.sum(axis=0) + pair_away.sum(axis=0)).astype(np.int64).reshape(n_teams, n_teams)
+        for row, s in enumerate(tied):
+            order[s] = Standings.from_matrices(
+                league["teams"],
+                h2h_points[row].reshape(n_teams, n_teams),
+                h2h_goals[row].reshape(n_teams, n_teams),
+                h2h_games,
+            ).order()
+
+    positions = np.broadcast_to(np.arange(n_teams), order.shape)
+    counts = np.bincount((order * n_teams + positions).ravel(), minlength=n_teams * n_teams)
+    return counts.reshape(n_teams, n_teams)
+
+
+def simulate_season(data, n_sims=100_000, seed=0, processes=None):
+    """
+    Monte Carlo the remaining fixtures `n_sims` times.
+    Returns [{"name": ..., "current_points": ..., "probabilities": [p(1st), p(2nd), ...]}]
+    sorted by expected final position.
+    """
+    league = build_league(build_season(data))
+    n_teams = len(league["teams"])
+    if n_teams == 0:
+        return []
+    lam_home, lam_away = scoring_rates(league)
+
+    sizes = [CHUNK_SIZE] * (n_sims // CHUNK_SIZE)
+    if n_sims % CHUNK_SIZE:
+        sizes.append(n_sims % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, n, league, lam_home, lam_away) for s, n in zip(seeds, sizes)]
+
+    processes = processes or min(MAX_PROCESSES, os.cpu_count() or 1)
+    if len(jobs) > 1 and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as pool:
+            counts = sum(pool.map(_simulate_chunk, jobs))
+    else:
+        counts = sum(map(_simulate_chunk, jobs))
+
+    probabilities = counts / max(n_sims, 1)
+    expected = probabilities @ np.arange(1, n_teams + 1)
+
+    odds = [
+        {
+            "name": league["teams"][t],
+            "current_points": int(league["points"][t]),
+            "expected_position": round(float(expected[t]), 2),
+            "probabilities": [round(float(p), 4) for p in probabilities[t]],
+        }
+        for t in range(n_teams)
+    ]
+    odds.sort(key=lambda x: x["expected_position"])
+    return odds
+
+
+def _cache_file(data, n_sims, seed):
+    return SIMULATIONS_DIR / f"{calendar_version(data)}-{n_sims}-{seed}.json"
+
+
+def load_simulation(data, n_sims=100_000, seed=0):
+    """Return the cached odds for this calendar version, or None if it hasn't been simulated yet."""
+    cache_file = _cache_file(data, n_sims, seed)
+    inc("fcf_cache_requests_total", cache="simulation")
+    if not cache_file.exists():
+        inc("fcf_cache_misses_total", cache="simulation")
+        return None
+    with open(cache_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_or_simulate(data, n_sims=100_000, seed=0, processes=None):
+    """Return cached odds for this calendar version, simulating only on a miss."""
+    odds = load_simulation(data, n_sims, seed)
+    if odds is not None:
+        return odds
+
+    cache_file = _cache_file(data, n_sims, seed)
+    odds = simulate_season(data, n_sims=n_sims, seed=seed, processes=processes)
+
+    # Written aside and moved into place so readers never see half a file; only the
+    # latest calendar's odds are kept
+    SIMULATIONS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(odds, f, ensure_ascii=False)
+    tmp.replace(cache_file)
+    for old in SIMULATIONS_DIR.glob("*.json"):
+        if old != cache_file:
+            old.unlink(missing_ok=True)
+    return odds
+
+
+if __name__ == "__main__":
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        calendar = json.load(f)
+
+    for row in load_or_simulate(calendar):
+        top = max(range(len(row["probabilities"])), key=lambda p: row["probabilities"][p])
+        print(f"{row['name']:<40} exp. pos {row['expected_position']:>5}  most likely {top + 1}")
@@ -0,0 +1,164 @@
+import numpy as np
+
+# --- League standings with the federation tiebreaks ---
+# Teams are ordered by points. Teams level on points are separated, in order, by:
+#   1. points in the mini-league of the matches between the tied teams
+#   2. goal difference in that mini-league
+#      (1 and 2 only count once every match between them has been played, home and away;
+#       if they split a group only partly, they are applied again to each smaller group)
+#   3. overall goal difference
+#   4. overall goals scored
+# and finally by name, so the order is always deterministic (FCF's last resort is fair play,
+# which the calendar doesn't publish).
+#
+# Head-to-head points, goals and games live in team × team matrices updated per result,
+# so a mini-league is a sub-matrix sum and a new result costs O(1), not a rescan.
+
+
+class Standings:
+    """
+    Incrementally maintained league table.
+
+    - points[i, j]: points team i took off team j
+    - goals[i, j]:  goals team i scored against team j
+    - games[i, j]:  matches played between i and j (symmetric)
+    """
+
+    def __init__(self, teams):
+        self.teams = list(teams)
+        self.index = {name: i for i, name in enumerate(self.teams)}
+        n = len(self.teams)
+        self.points = np.zeros((n, n), dtype=np.int64)
+        self.goals = np.zeros((n, n), dtype=np.int64)
+        self.games = np.zeros((n, n), dtype=np.int64)
+        # Home/away splits for the ratios shown in the classification table
+        self.home_points = np.zeros(n, dtype=np.int64)
+        self.away_points = np.zeros(n, dtype=np.int64)
+        self.played_home = np.zeros(n, dtype=np.int64)
+        self.played_away = np.zeros(n, dtype=np.int64)
+        self._results = {}  # match key -> (home, away, home_score, away_score)
+
+    @classmethod
+    def from_season(cls, season):
+        standings = cls(season.team_names)
+        standings.sync(season)
+        return standings
+
+    @classmethod
+    def from_matrices(cls, teams, points, goals, games):
+        """A table to rank from head-to-head matrices alone (no home/away splits), e.g. a simulated season."""
+        standings = cls(teams)
+        standings.points, standings.goals, standings.games = points, goals, games
+        return standings
+
+    @staticmethod
+    def _key(match):
+        return match.id if match.id is not None else (match.jornada, match.home_team, match.away_team)
+
+    def _add(self, result, sign):
+        h, a, hs, as_ = result
+        home_points, away_points = (3, 0) if hs > as_ else (1, 1) if hs == as_ else (0, 3)
+        self.points[h, a] += sign * home_points
+        self.points[a, h] += sign * away_points
+        self.goals[h, a] += sign * hs
+        self.goals[a, h] += sign * as_
+        self.games[h, a] += sign
+        self.games[a, h] += sign
+        self.home_points[h] += sign * home_points
+        self.away_points[a] += sign * away_points
+        self.played_home[h] += sign
+        self.played_away[a] += sign
+
+    def apply(self, match):
+        """Add, correct or withdraw one match's result. Returns True if the table changed."""
+        key = self._key(match)
+        new = None
+        if match.played and match.home_score is not None and match.away_score is not None:
+            new = (self.index[match.home_team], self.index[match.away_team], match.home_score, match.away_score)
+        old = self._results.get(key)
+        if old == new:
+            return False
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+            self._results[key] = new
+        else:
+            del self._results[key]
+        return True
+
+    def sync(self, season):
+        """Apply only the results that differ from the ones already counted. Returns how many changed."""
+        changed = sum(self.apply(match) for match in season.matches)
+        seen = {self._key(match) for match in season.matches}
+        for key in [k for k in self._results if k not in seen]:
+            self._add(self._results.pop(key), -1)
+            changed += 1
+        return changed
+
+    # --- Ranking ---
+    def totals(self):
+        """(points, goals for, goals against, games played) per team."""
+        return self.points.sum(axis=1), self.goals.sum(axis=1), self.goals.sum(axis=0), self.games.sum(axis=1)
+
+    def mini_league(self, group):
+        """(points, goal difference) of each team of `group` counting only matches among them."""
+        sub = np.ix_(group, group)
+        return self.points[sub].sum(axis=1), self.goals[sub].sum(axis=1) - self.goals[sub].sum(axis=0)
+
+    def _mini_league_complete(self, group):
+        games = self.games[np.ix_(group, group)]
+        return bool((games + 2 * np.eye(len(group), dtype=np.int64) >= 2).all())
+
+    def _split(self, group, keys):
+        """Partition `group` (best first) into runs of equal `keys`."""
+        order = sorted(group, key=lambda t: tuple(-k[t] for k in keys))
+        runs, last = [], None
+        for t in order:
+            key = tuple(k[t] for k in keys)
+            if key != last:
+                runs.append([])
+                last = key
+            runs[-1].append(t)
+        return runs
+
+    def _resolve(self, group, gd, gf):
+        if len(group) == 1:
+            return group
+        if self._mini_league_complete(group):
+            points, goal_diff = self.mini_league(group)
+            keys = ({t: p for t, p in zip(group, points)}, {t: d for t, d in zip(group, goal_diff)})
+            runs = self._split(group, keys)
+            if len(runs) > 1:
+                return [t for run in runs for t in self._resolve(run, gd, gf)]
+        return sorted(group, key=lambda t: (-gd[t], -gf[t], self.teams[t]))
+
+    def order(self):
+        """Team indices from first to last."""
+        points, gf, ga, _ = self.totals()
+        gd = gf - ga
+        ranked = []
+        for run in self._split(range(len(self.teams)), ({t: points[t] for t in range(len(self.teams))},)):
+            ranked.extend(self._resolve(run, gd, gf))
+        return ranked
+
+    def records(self, team_ids=None):
+        """Classification rows (same fields as the classification table), in table order with 'position'."""
+        points, gf, ga, played = self.totals()
+        team_ids = team_ids or {}
+        records = []
+        for position, t in enumerate(self.order(), 1):
+            games = int(played[t])
+            records.append({
+                "name": self.teams[t],
+                "team_id": team_ids.get(self.teams[t]),
+                "position": position,
+                "home_points_ratio": round(int(self.home_points[t]) / int(self.played_home[t]), 2) if self.played_home[t] else 0,
+                "away_points_ratio": round(int(self.away_points[t]) / int(self.played_away[t]), 2) if self.played_away[t] else 0,
+                "avg_goals_favor": round(int(gf[t]) / max(games, 1), 2),
+                "avg_goals_against": round(int(ga[t]) / max(games, 1), 2),
+                "avg_points": round(int(points[t]) / games, 2) if games else 0,
+                "total_points": int(points[t]),
+                "games_played": games,
+            })
+        return records
@@ -0,0 +1,117 @@
+"""
+Concurrent-session load harness for the Streamlit app.
+
+Every simulated session is its own process (Streamlit's AppTest keeps global runtime
+state, so sessions can't share one interpreter) rendering the main page and both pages
+against a shared offline SQLite database. For each session count it reports render
+latency percentiles, backend calls / rows per render and memory per session.
+
+    python src/tools/load_test.py --sessions 1 4 16 --renders 5 --users 16
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+PAGES = {
+    "app": SRC_DIR / "app.py",
+    "results": SRC_DIR / "pages" / "results.py",
+    "statistics": SRC_DIR / "pages" / "statistics.py",
+}
+
+
+def _session(db_path, renders, live):
+    """Run one simulated session and return its per-render measurements."""
+    os.environ["FCF_BACKEND"] = "offline"
+    os.environ["FCF_OFFLINE_DB"] = db_path
+    sys.path.insert(0, str(SRC_DIR))
+
+    from streamlit.testing.v1 import AppTest
+    from db.offline import get_offline_client
+    import render
+
+    if live:
+        # Point the pages at an empty site dir so they render from the backend
+        render.SITE_DIR = Path(tempfile.mkdtemp())
+
+    client = get_offline_client()
+
+    # Warm-up: imports and first-run costs are not part of the measurements
+    for path in PAGES.values():
+        AppTest.from_file(str(path), default_timeout=120).run()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    samples = []
+    for _ in range(renders):
+        for name, path in PAGES.items():
+            client.reset_stats()
+            start = time.perf_counter()
+            at = AppTest.from_file(str(path), default_timeout=120).run()
+            samples.append({
+                "page": name,
+                "latency": time.perf_counter() - start,
+                "calls": client.calls,
+                "rows": client.rows,
+                "errors": len(at.exception),
+            })
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"samples": samples, "peak_kb": peak_kb, "growth_kb": peak_kb - baseline_kb}
+
+
+def seed_database(db_path, users):
+    sys.path.insert(0, str(SRC_DIR))
+    from db.offline import OfflineClient, seed_offline
+    from season import load_season
+
+    season = load_season()
+    if season is None:
+        sys.exit("⚠️ No match data found. Please run the scraper first.")
+    return seed_offline(OfflineClient(db_path), season, [f"User{i:03d}" for i in range(users)])
+
+
+def run(session_counts, renders, users, live):
+    db_path = str(Path(tempfile.mkdtemp()) / "offline.db")
+    upcoming = seed_database(db_path, users)
+    print(f"🔹 Offline database with {users} users, upcoming jornada {upcoming} ({'live' if live else 'prebuilt'} pages)")
+
+    header = f"{'sessions':>8} {'page':<11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls':>6} {'rows':>7} {'errors':>6}"
+    context = multiprocessing.get_context("spawn")
+
+    for sessions in session_counts:
+        with ProcessPoolExecutor(max_workers=sessions, mp_context=context) as pool:
+            futures = [pool.submit(_session, db_path, renders, live) for _ in range(sessions)]
+            outcomes = [f.result() for f in futures]
+
+        print(f"\n{header}")
+        samples = [s for o in outcomes for s in o["samples"]]
+        for page in PAGES:
+            rows = [s for s in samples if s["page"] == page]
+            latency = np.array([s["latency"] for s in rows]) * 1000
+            p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+            print(
+                f"{sessions:>8} {page:<11} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+                f"{np.mean([s['calls'] for s in rows]):>6.1f} {np.mean([s['rows'] for s in rows]):>7.0f} "
+                f"{sum(s['errors'] for s in rows):>6}"
+            )
+        peak = np.mean([o["peak_kb"] for o in outcomes]) / 1024
+        growth = np.mean([o["growth_kb"] for o in outcomes]) / 1024
+        print(f"{'':>8} memory per session: {peak:.0f} MiB peak RSS, +{growth:.1f} MiB during measured renders")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Streamlit pages against the offline backend.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--renders", type=int, default=3, help="renders of every page per session")
+    parser.add_argument("--users", type=int, default=16, help="synthetic users with predictions")
+    parser.add_argument("--live", action="store_true", help="ignore pre-rendered pages and query the backend")
+    args = parser.parse_args()
+    run(args.sessions, args.renders, args.users, args.live)
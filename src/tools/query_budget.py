@@ -0,0 +1,179 @@
+"""
+Query-budget check for every page and logic function.
+
+Renders app.py, pages/results.py and pages/statistics.py with cold caches and calls each
+`logic` function against the instrumented offline backend, for several league sizes.
+A second pool of the same size is seeded next to the measured one, so a query that
+forgets its pool filter blows the row budget.
+Exits with status 1 if a page raises, or if anything issues more backend calls or fetches
+more rows than its declared budget, so a re-introduced per-match query loop fails the build.
+tests/test_query_budget.py runs it with the test suite.
+
+    python src/tools/query_budget.py --users 16 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+PAGE_SIZE = 1000  # db.paging.PAGE_SIZE
+
+
+# Extra round trips a page may make before its budget fails: room for a new widget's
+# query. Logic functions get none, their call count is their contract (a second call
+# in a one-query function is the regression this check exists for).
+PAGE_HEADROOM = 2
+
+
+def pages(rows):
+    """Round trips needed to page through `rows` rows (the last, short page included)."""
+    return rows // PAGE_SIZE + 1
+
+
+# Budgets for a league of `users` predicting `matches` matches per jornada over `jornadas`
+# jornadas. Rows are the maximum the call may fetch; calls are backend round trips, with
+# one per page for reads that go through db.paging. Page call budgets never grow with the
+# number of matches except through paging: every page reads a jornada in one query.
+# Page call budgets are the measured round trips plus PAGE_HEADROOM; page row budgets
+# carry 100 rows of slack.
+BUDGETS = {
+    # --- pages (cold caches) ---
+    "page:app":                          {"calls": lambda u, m, j: 10 + pages(u * m) + PAGE_HEADROOM, "rows": lambda u, m, j: u * m + u + 6 * m + 100},
+    "page:results":                      {"calls": lambda u, m, j: 8 + 2 * pages(u * m) + PAGE_HEADROOM, "rows": lambda u, m, j: 2 * u * m + u + 4 * m + 100},
+    "page:statistics":                   {"calls": lambda u, m, j: 9 + pages(u) + pages(u * j) + PAGE_HEADROOM, "rows": lambda u, m, j: 2 * u + u * j + 6 * m + 100},
+    # --- logic ---
+    "get_prediction_distribution":       {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 3 * m},
+    "get_match_predictions":             {"calls": lambda u, m, j: pages(u * m), "rows": lambda u, m, j: u * m},
+    "get_number_of_users":               {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 1},
+    "get_next_matchday":                 {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 1},
+    "get_last_matchday":                 {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 1},
+    "get_matches":                       {"calls": lambda u, m, j: 2, "rows": lambda u, m, j: 3 * m},
+    "get_classification":                {"calls": lambda u, m, j: 3, "rows": lambda u, m, j: 6 * m},
+    "get_match_probabilities":           {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 2 * m},
+    "get_last_refresh":                  {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 1},
+    "get_top_users":                     {"calls": lambda u, m, j: pages(u), "rows": lambda u, m, j: u},
+    "get_user_timeline":                 {"calls": lambda u, m, j: pages(u * j), "rows": lambda u, m, j: u * j},
+    "get_users_hits_last_matchday":      {"calls": lambda u, m, j: 1 + pages(u), "rows": lambda u, m, j: u + 1},
+    "get_jackpot_for_matchday":          {"calls": lambda u, m, j: 1, "rows": lambda u, m, j: 1},
+    "get_historic_winners":              {"calls": lambda u, m, j: pages(u * j), "rows": lambda u, m, j: u * j},
+    "get_jornada_contenders":            {"calls": lambda u, m, j: 1 + pages(u * m), "rows": lambda u, m, j: u * m + m},
+    "get_all_predictions":               {"calls": lambda u, m, j: pages(u * m * j), "rows": lambda u, m, j: u * m * j},
+    "save_predictions_db":               {"calls": lambda u, m, j: 0, "rows": lambda u, m, j: 0},
+    "flush_outbox":                      {"calls": lambda u, m, j: 2, "rows": lambda u, m, j: m},
+}
+
+
+def _logic_calls(logic, outbox, upcoming, last, matches):
+    """(name, thunk) pairs for every logic function, with arguments for the seeded league."""
+    picks = {
+        f"{m['home_team']}-{m['away_team']}": {"match": "", "match_id": m["match_id"], "home_team": m["home_team"],
+                                                "away_team": m["away_team"], "prediction": "1"}
+        for m in matches
+    }
+    return [
+        ("get_prediction_distribution", lambda: logic.get_prediction_distribution([m["match_id"] for m in matches])),
+        ("get_match_predictions", lambda: logic.get_match_predictions(upcoming)),
+        ("get_number_of_users", lambda: logic.get_number_of_users(upcoming)),
+        ("get_next_matchday", logic.get_next_matchday),
+        ("get_last_matchday", logic.get_last_matchday),
+        ("get_matches", lambda: logic.get_matches(upcoming)),
+        ("get_classification", logic.get_classification),
+        ("get_match_probabilities", lambda: logic.get_match_probabilities(matches)),
+        ("get_last_refresh", logic.get_last_refresh),
+        ("get_top_users", logic.get_top_users),
+        ("get_user_timeline", logic.get_user_timeline),
+        ("get_users_hits_last_matchday", logic.get_users_hits_last_matchday),
+        ("get_jackpot_for_matchday", lambda: logic.get_jackpot_for_matchday(upcoming)),
+        ("get_historic_winners", logic.get_historic_winners),
+        ("get_jornada_contenders", lambda: logic.get_jornada_contenders(last)),
+        ("get_all_predictions", logic.get_all_predictions),
+        ("save_predictions_db", lambda: logic.save_predictions_db("User000", upcoming, picks)),
+        ("flush_outbox", lambda: outbox.flush(logic.supabase)),
+    ]
+
+
+def measure(users):
+    """
+    Seed a league of `users` and return ({name: (calls, rows)}, league dimensions,
+    {page name: exception message} for the pages that raised).
+    """
+    from streamlit.testing.v1 import AppTest
+    import streamlit as st
+    from db.offline import OfflineClient, seed_offline
+    from season import load_season
+    from db import outbox
+    # Flush explicitly so the background flusher doesn't race the counters
+    outbox.OUTBOX_FILE = Path(tempfile.mkdtemp()) / "predictions.wal"
+    outbox.start_flusher = lambda *args, **kwargs: None
+    import logic
+    import render
+    import export
+    from db.timeline import update_timeline
+    from db.update import load_pools, update_ratings
+
+    season = load_season()
+    client = OfflineClient()
+    upcoming = seed_offline(client, season, [f"User{i:03d}" for i in range(users)])
+    # A second pool just as big: pool 1's budgets must not notice it
+    seed_offline(client, season, [f"Other{i:03d}" for i in range(users)], pool_id=2)
+    update_timeline(season, client, load_pools(client))
+    update_ratings(season, client)
+    # logic and every page share the module-level client
+    logic.supabase = client
+    render.SITE_DIR = Path(tempfile.mkdtemp())  # measure live rendering, not prebuilt pages
+    export.EXPORT_DIR = Path(tempfile.mkdtemp())
+
+    matches = logic.get_matches(upcoming)
+    dims = (users, max(len(j.matches) for j in season.jornadas), len(season.jornadas))
+    measured, errors = {}, {}
+
+    for page in ("app", "results", "statistics"):
+        path = SRC_DIR / ("app.py" if page == "app" else f"pages/{page}.py")
+        st.cache_data.clear()
+        client.reset_stats()
+        at = AppTest.from_file(str(path), default_timeout=120).run()
+        if at.exception:
+            errors[f"page:{page}"] = at.exception[0].message
+        measured[f"page:{page}"] = (client.calls, client.rows)
+
+    last = logic.get_last_matchday()["number"]
+    for name, call in _logic_calls(logic, outbox, upcoming, last, matches):
+        client.reset_stats()
+        call()
+        measured[name] = (client.calls, client.rows)
+
+    return measured, dims, errors
+
+
+def check(user_counts):
+    os.environ["FCF_BACKEND"] = "offline"
+    sys.path.insert(0, str(SRC_DIR))
+
+    failures = 0
+    for users in user_counts:
+        measured, dims, errors = measure(users)
+        print(f"\n🔹 League: {dims[0]} users, {dims[1]} matches per jornada, {dims[2]} jornadas")
+        print(f"{'':2} {'name':<32} {'calls':>11} {'rows':>15}")
+        for name, (calls, rows) in measured.items():
+            max_calls = BUDGETS[name]["calls"](*dims)
+            max_rows = BUDGETS[name]["rows"](*dims)
+            ok = calls <= max_calls and rows <= max_rows
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:<32} {calls:>5} / {max_calls:<5} {rows:>7} / {max_rows:<7}")
+        # A page that raised stopped early: its counts prove nothing
+        for name, message in errors.items():
+            failures += 1
+            print(f"❌ {name} raised: {message}")
+
+    if failures:
+        print(f"\n❌ {failures} query budgets exceeded or pages failed.")
+        sys.exit(1)
+    print("\n✅ All query budgets respected.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if a page or logic function exceeds its query budget.")
+    parser.add_argument("--users", type=int, nargs="+", default=[16, 200])
+    check(parser.parse_args().users)
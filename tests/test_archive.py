@@ -0,0 +1,13 @@
+import archive
+
+
+def test_reads_only_the_requested_partition(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(archive, "STAGING_DIR", tmp_path / ".staging")
+    archive.write_partition("results", "2425", "gr11", [{"jornada": 1, "result": "1"}])
+    archive.write_partition("results", "2526", "gr11", [{"jornada": 1, "result": "X"}, {"jornada": 2, "result": "2"}])
+
+    assert archive.list_seasons("results") == [("2425", "gr11"), ("2526", "gr11")]
+    df = archive.read_archive("results", columns=["jornada", "result"], filters=[("season", "==", "2526")])
+    assert df.to_dict("records") == [{"jornada": 1, "result": "X"}, {"jornada": 2, "result": "2"}]
+    assert archive.read_archive("standings").empty
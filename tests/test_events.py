@@ -0,0 +1,32 @@
+from db.events import compact_predictions, event_rows
+from db.offline import OfflineClient
+
+
+def picks(client, username):
+    rows = client.table("predictions").select("*").eq("username", username).execute().data
+    return {(r["home_team"], r["away_team"]): r["prediction"] for r in rows}
+
+
+def save(client, save_id, username, saved_at, predictions):
+    records = [
+        {"home_team": home, "away_team": away, "prediction": p, "timestamp": saved_at}
+        for (home, away), p in predictions.items()
+    ]
+    client.table("prediction_events").insert(
+        event_rows(save_id, 1, username, 5, records, recorded_at=saved_at)
+    ).execute()
+
+
+def test_compaction_overwrites_picks_and_drops_the_ones_left_out():
+    client = OfflineClient()
+    save(client, "a1", "Ana", "2025-11-08T10:00:00", {("A", "B"): "1", ("C", "D"): "X"})
+    save(client, "m1", "Marc", "2025-11-08T10:05:00", {("A", "B"): "2"})
+    assert compact_predictions(client) == [1]
+    assert picks(client, "Ana") == {("A", "B"): "1", ("C", "D"): "X"}
+
+    save(client, "a2", "Ana", "2025-11-08T11:00:00", {("A", "B"): "2", ("E", "F"): "1"})
+    assert compact_predictions(client) == [1]
+    assert picks(client, "Ana") == {("A", "B"): "2", ("E", "F"): "1"}
+    # Users without a newer save keep their picks untouched
+    assert picks(client, "Marc") == {("A", "B"): "2"}
+    assert compact_predictions(client) == []
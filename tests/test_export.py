@@ -0,0 +1,17 @@
+import json
+
+import export
+
+
+def test_snapshots_replace_files_whole(tmp_path):
+    manifest = {}
+    assert export.write_snapshot("standings", [{"name": "A", "position": 1}], manifest, tmp_path)
+    assert not export.write_snapshot("standings", [{"name": "A", "position": 1}], manifest, tmp_path)
+    assert json.loads((tmp_path / "standings.json").read_text())["data"] == [{"name": "A", "position": 1}]
+    assert (tmp_path / "standings.csv").read_text().splitlines() == ["name,position", "A,1"]
+    # No temporary files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["standings.csv", "standings.json"]
+
+
+def test_servers_bind_localhost_by_default():
+    assert export.BIND_HOST == "127.0.0.1"
@@ -0,0 +1,46 @@
+import pytest
+
+from live_jornada import jornada_contenders
+
+MATCHES = [("A", "B"), ("C", "D")]
+
+
+def picks(user, outcomes, jornada=1):
+    return [
+        {"username": user, "jornada": jornada, "home_team": h, "away_team": a, "prediction": p}
+        for (h, a), p in zip(MATCHES, outcomes)
+    ]
+
+
+def results(outcomes, jornada=1):
+    return [{"matchday": jornada, "home_team": h, "away_team": a, "result": r} for (h, a), r in zip(MATCHES, outcomes)]
+
+
+def by_user(contenders):
+    return {c["username"]: c for c in contenders}
+
+
+def test_decided_jornada_lone_winner_takes_whole_jackpot():
+    rows = by_user(jornada_contenders(picks("Adri", ["1", "X"]) + picks("Joan", ["2", "X"]), results(["1", "X"]), 1))
+    assert rows["Adri"]["p_jackpot"] == 1.0
+    assert rows["Adri"]["jackpot_share"] == 1.0
+    assert rows["Joan"]["jackpot_share"] == 0.0
+
+
+def test_decided_jornada_winners_split_jackpot():
+    rows = by_user(jornada_contenders(
+        picks("Adri", ["1", "X"]) + picks("Joan", ["1", "X"]) + picks("Luca", ["2", "2"]), results(["1", "X"]), 1
+    ))
+    assert rows["Adri"]["jackpot_share"] == 0.5
+    assert rows["Joan"]["jackpot_share"] == 0.5
+    assert rows["Luca"]["jackpot_share"] == 0.0
+
+
+def test_identical_pending_picks_share_the_jackpot():
+    rows = by_user(jornada_contenders(
+        picks("Adri", ["1", "X"]) + picks("Joan", ["1", "X"]) + picks("Luca", ["1", "2"]), results(["1", None]), 1
+    ))
+    assert rows["Adri"]["p_jackpot"] == pytest.approx(1 / 3, abs=1e-4)
+    assert rows["Adri"]["jackpot_share"] == pytest.approx(1 / 6, abs=1e-4)
+    assert rows["Joan"]["jackpot_share"] == rows["Adri"]["jackpot_share"]
+    assert rows["Luca"]["jackpot_share"] == pytest.approx(1 / 3, abs=1e-4)
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from db import migrations
+from db.views import VIEWS
+
+
+def tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def views(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'view'")}
+
+
+def test_fresh_database_reaches_latest_version():
+    conn = sqlite3.connect(":memory:")
+    applied = migrations.migrate(conn)
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    assert views(conn) == set(VIEWS)
+    assert not migrations.verify(conn)
+
+
+def test_failing_migration_leaves_nothing_behind(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    migrations.migrate(conn)
+    broken = (migrations.LATEST_VERSION + 1, "broken", """
+        CREATE TABLE half_done (id INTEGER PRIMARY KEY);
+        INSERT INTO half_done (id) VALUES (1);
+        INSERT INTO no_such_table (id) VALUES (1);
+    """)
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate(conn)
+    assert "half_done" not in tables(conn)
+    assert broken[0] not in migrations.applied_versions(conn)
+    assert views(conn) == set(VIEWS)
+
+    # Fixed, it applies cleanly on the next run
+    fixed = (broken[0], "fixed", "CREATE TABLE half_done (id INTEGER PRIMARY KEY);")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:-1] + [fixed])
+    assert migrations.migrate(conn) == [broken[0]]
+    assert "half_done" in tables(conn)
@@ -0,0 +1,28 @@
+import pytest
+
+from db.pipeline import Stage, run_pipeline
+
+
+def fail(_):
+    raise RuntimeError("boom")
+
+
+def test_failed_stage_stops_its_dependants(monkeypatch):
+    monkeypatch.delenv("FCF_SKIP_STAGES", raising=False)
+    ran = []
+    outputs, _ = run_pipeline([
+        Stage("pools", fail),
+        Stage("jackpot", lambda o: ran.append("jackpot"), ("pools",), reads=("pools",)),
+        Stage("ratings", lambda _: ran.append("ratings") or 3),
+    ])
+    assert ran == ["ratings"]
+    assert outputs == {"ratings": 3}
+
+
+def test_skipping_a_stage_that_is_read_is_refused(monkeypatch):
+    monkeypatch.delenv("FCF_SKIP_STAGES", raising=False)
+    stages = [Stage("pools", lambda _: {1: []}), Stage("jackpot", lambda o: o["pools"], ("pools",), reads=("pools",))]
+    with pytest.raises(ValueError, match="pools"):
+        run_pipeline(stages, skip=("pools",))
+    # Skipping the reader as well is fine
+    assert run_pipeline(stages, skip=("pools", "jackpot"))[0] == {}
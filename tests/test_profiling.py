@@ -0,0 +1,25 @@
+import os
+from collections import Counter
+
+import profiling
+
+
+def test_query_parameter_needs_fcf_profile_query(monkeypatch):
+    monkeypatch.delenv("FCF_PROFILE", raising=False)
+    assert not profiling.profiling_enabled("1")
+    monkeypatch.setenv("FCF_PROFILE", "query")
+    assert profiling.profiling_enabled("1")
+    assert not profiling.profiling_enabled(None)
+    monkeypatch.setenv("FCF_PROFILE", "1")
+    assert profiling.profiling_enabled(None)
+
+
+def test_only_the_newest_profiles_are_kept(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    for i in range(5):
+        path = tmp_path / f"old{i}.folded"
+        path.write_text("a;b 1\n")
+        os.utime(path, (i, i))
+    monkeypatch.setattr(profiling, "MAX_PROFILES", 3)
+    saved = profiling.save_profile("app", Counter({"a;b": 2}), 0.1)
+    assert sorted(p.name for p in tmp_path.glob("*.folded")) == sorted([saved.name, "old4.folded", "old3.folded"])
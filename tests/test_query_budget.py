@@ -0,0 +1,14 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "src" / "tools" / "query_budget.py"
+
+
+@pytest.mark.parametrize("users", [16, 200])
+def test_pages_and_logic_stay_within_their_query_budgets(users):
+    # Its own process: the check points logic, the outbox and the page caches at a seeded offline backend
+    run = subprocess.run([sys.executable, str(SCRIPT), "--users", str(users)], capture_output=True, text=True)
+    assert run.returncode == 0, run.stdout[-4000:] + run.stderr[-4000:]
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+import render
+from db.offline import OfflineClient, seed_offline
+from season import load_season
+
+
+@pytest.fixture
+def site(monkeypatch, tmp_path):
+    season = load_season()
+    if season is None:
+        pytest.skip("no calendar in data/futbolcalendar")
+    client = OfflineClient()
+    seed_offline(client, season, [f"User{i:03d}" for i in range(4)])
+    monkeypatch.setattr(render, "SITE_DIR", tmp_path)
+    return client, tmp_path
+
+
+def test_render_site_uses_the_odds_it_is_given(site):
+    client, site_dir = site
+    odds = [{"name": "Given Odds FC", "probabilities": [1.0]}]
+    render.render_site(client, odds=odds)
+    assert "Given Odds FC" in (site_dir / "statistics.html").read_text(encoding="utf-8")
+    stamps = json.loads((site_dir / render.STAMP_FILE).read_text(encoding="utf-8"))
+    assert "statistics" in stamps
+    # Every file was renamed into place, no temporary file is left
+    assert not [p for p in site_dir.iterdir() if p.name.endswith(".tmp")]
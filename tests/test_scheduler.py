@@ -0,0 +1,32 @@
+from datetime import date, datetime, timezone
+
+import db.update
+from scrap import scheduler
+from season import Jornada, Season, Match
+
+
+def test_windows_are_local_to_catalonia():
+    match = Match(jornada=1, home_team="A", away_team="B", home_score=None, away_score=None,
+                  result=None, match_report=None)
+    windows = scheduler.polling_windows(Season((Jornada(1, "Jornada 1", date(2025, 10, 4), (match,)),), {}))
+    friday_start = windows[0][0]
+    assert friday_start.tzinfo == scheduler.LOCAL_TZ
+    # 20:00 kickoff + 1:30 in Madrid (CEST) is 19:30 UTC, whatever the host's zone
+    assert friday_start.astimezone(timezone.utc) == datetime(2025, 10, 3, 19, 30, tzinfo=timezone.utc)
+    assert scheduler.next_poll(datetime(2025, 10, 3, 19, 45, tzinfo=timezone.utc), windows)[0] is not None
+
+
+def test_failed_update_stays_pending(monkeypatch):
+    marked = []
+    monkeypatch.setattr(scheduler, "scrap_results_if_changed", lambda: True)
+    monkeypatch.setattr(scheduler, "update_pending", lambda: True)
+    monkeypatch.setattr(scheduler, "mark_updated", lambda: marked.append(True))
+    monkeypatch.setattr(scheduler, "write_textfile", lambda: None)
+
+    monkeypatch.setattr(db.update, "update_data", lambda: False)
+    scheduler.poll_once()
+    assert marked == []
+
+    monkeypatch.setattr(db.update, "update_data", lambda: True)
+    scheduler.poll_once()
+    assert marked == [True]
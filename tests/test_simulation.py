@@ -0,0 +1,41 @@
+from datetime import date
+
+import numpy as np
+
+import simulation
+from season import Jornada, Match, Season, Team
+from standings import Standings
+
+
+def match(jornada, home, away, home_score=None, away_score=None):
+    result = None if home_score is None else "1" if home_score > away_score else "X" if home_score == away_score else "2"
+    return Match(jornada=jornada, home_team=home, away_team=away, home_score=home_score, away_score=away_score,
+                 result=result, match_report=None)
+
+
+def season(matches):
+    teams = {name: Team(name, None) for name in ("A", "B", "C")}
+    return Season((Jornada(1, "Jornada 1", date(2025, 10, 4), tuple(matches)),), teams)
+
+
+def simulate(s, n=200):
+    league = simulation.build_league(s)
+    lam_home, lam_away = simulation.scoring_rates(league)
+    return simulation._simulate_chunk((np.random.SeedSequence(0), n, league, lam_home, lam_away))
+
+
+def test_points_ties_use_head_to_head_like_the_table():
+    # A and B finish on 4 points; B has the better goal difference, A won their head-to-head
+    s = season([match(1, "A", "B", 1, 0), match(1, "B", "A", 0, 0), match(1, "B", "C", 10, 0)])
+    assert [s.team_names[t] for t in Standings.from_season(s).order()] == ["A", "B", "C"]
+    counts = simulate(s)
+    assert counts[0, 0] == counts[1, 1] == counts[2, 2] == 200
+
+
+def test_cache_keeps_only_the_latest_calendar(tmp_path, monkeypatch):
+    monkeypatch.setattr(simulation, "SIMULATIONS_DIR", tmp_path)
+    monkeypatch.setattr(simulation, "simulate_season", lambda data, **_: [{"name": str(data)}])
+    simulation.load_or_simulate({"v": 1})
+    simulation.load_or_simulate({"v": 2})
+    assert [p.name for p in tmp_path.iterdir()] == [simulation._cache_file({"v": 2}, 100_000, 0).name]
+    assert simulation.load_simulation({"v": 2}) == [{"name": "{'v': 2}"}]